@@ -8,12 +8,22 @@ from datetime import datetime
 from PIL import Image, ImageTk, ImageDraw
 import xml.etree.ElementTree as ET
 import xml.dom.minidom
+from xml.parsers import expat
 from io import BytesIO
 import pystray
 from pystray import MenuItem as item
 import threading
+import queue
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, CancelledError, wait, FIRST_COMPLETED
 import time
 import re
+from bisect import bisect_left, bisect_right
+from collections import namedtuple, OrderedDict, deque
+import shlex
+import socket
+import struct
+import zlib
 from tkinter import font as tkfont
 import requests
 import json
@@ -28,6 +38,1506 @@ else:
 
 g_attributes = ['text=', 'resource-id=', f'{var_content_desc}=', 'package=', 'class=', 'bounds=']
 
+# 스크린샷 캡처 방식 ('raw': framebuffer 직접 읽기, 'png': screencap -p)
+screencap_mode = 'raw'
+
+# screencap -p 출력 검증용 PNG 시그니처
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# 레이아웃 덤프 파일 polling 설정 (초)
+LAYOUT_DUMP_TIMEOUT = 10.0
+LAYOUT_POLL_INITIAL_DELAY = 0.05
+LAYOUT_POLL_MAX_DELAY = 0.8
+
+# adb track-devices 재연결 대기 시간 (초)
+TRACK_RETRY_INITIAL_DELAY = 0.5
+TRACK_RETRY_MAX_DELAY = 5.0
+
+# adb shell v2 프로토콜 packet id
+SHELL_V2_STDOUT = 1
+SHELL_V2_STDERR = 2
+SHELL_V2_EXIT = 3
+
+# 전체 디바이스 일괄 캡처 설정
+CAPTURE_ALL_MAX_WORKERS = 4
+CAPTURE_ALL_TIMEOUT = 60.0  # 디바이스별 제한 시간 (초)
+
+# 디바이스 정보 조회 대상 속성
+DEVICE_INFO_PROPS = [
+    'ro.product.model', 'ro.product.brand', 'ro.product.manufacturer',
+    'ro.build.version.release', 'ro.build.version.sdk',
+    'ro.product.cpu.abi', 'ro.build.display.id'
+]
+
+# getprop 필터링과 mViewports 추출을 한 번의 shell 호출로 실행
+DEVICE_INFO_COMMAND = (
+    "getprop | grep -E '^\\[(" + '|'.join(re.escape(prop) for prop in DEVICE_INFO_PROPS) + ")\\]'; "
+    "dumpsys display | grep 'mViewports='; "
+    "true"  # mViewports가 없는 기기에서도 getprop 결과를 받도록 종료 코드는 항상 0
+)
+PROP_LINE_PATTERN = re.compile(r'^\[([^\]]+)\]: \[(.*)\]\s*$', re.MULTILINE)
+VIEWPORT_PATTERN = re.compile(
+    r'DisplayViewport\{[^}]*displayId=(\d+)[^}]*deviceWidth=(\d+)[^}]*deviceHeight=(\d+)[^}]*\}')
+
+# 디바이스 정보 캐시 유지 시간 (초)
+DEVICE_INFO_CACHE_TTL = 300.0
+
+# 레이아웃 텍스트 파싱용 패턴
+XML_TAG_LINE_PATTERN = re.compile(r'<([\w:.-]+)')
+XML_ATTRIBUTE_PATTERN = re.compile(r'([\w:.-]+)="([^"]*)"')
+XML_ENTITY_PATTERN = re.compile(r'&(#x[0-9a-fA-F]+|#\d+|amp|lt|gt|quot|apos);')
+XML_ENTITIES = {'amp': '&', 'lt': '<', 'gt': '>', 'quot': '"', 'apos': "'"}
+
+# bounds 속성 형식별 패턴 ('[x1,y1][x2,y2]' 또는 stp 덤프의 '{x, y, w, h}')
+BOUNDS_FORMAT_PATTERNS = {
+    'corners': re.compile(r'\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]'),
+    'xywh': re.compile(r'\{(-?\d+), *(-?\d+), *(-?\d+), *(-?\d+)\}'),
+}
+
+# 특정 필드 검색용 속성 인덱스 대상 (content-desc와 stp 덤프의 talkback 모두 포함)
+INDEXED_ATTRIBUTES = ['text', 'resource-id', 'content-desc', 'talkback', 'hint', 'package', 'class']
+
+# 클릭 hit-test용 공간 인덱스 설정
+GRID_CELLS_PER_AXIS = 64
+GRID_LARGE_NODE_CELLS = 256  # 이보다 많은 칸을 덮는 node는 별도 목록으로 관리
+
+# 검색 결과 표시 설정
+SEARCH_RESULT_PAGE_SIZE = 200  # 결과 창을 스크롤할 때 한 번에 추가하는 줄 수
+SEARCH_RESULT_PREFETCH = 0.9  # 스크롤 위치가 이 비율을 넘으면 다음 페이지 추가
+TAG_RANGE_BATCH_SIZE = 1000  # tag_add 한 번에 넘기는 범위 수
+SEARCH_DEBOUNCE_MS = 250  # 레이아웃 텍스트 검색어 입력 후 검색까지 대기 시간
+
+# Tcl 8.6 Text index는 BMP 밖의 문자(이모지 등)를 UTF-16 surrogate pair 2칸으로 셈
+TK_INDEX_UTF16 = tk.TclVersion < 9.0
+
+# 백그라운드 검색 설정
+SEARCH_POLL_MS = 50  # worker 결과 queue 확인 주기 (worker도 이 주기로 결과를 묶어서 보냄)
+SEARCH_BATCH_SIZE = 2000  # worker가 한 번에 보내는 최대 결과 수
+SEARCH_DRAIN_BUDGET = 0.02  # 한 번의 queue 확인에서 UI 갱신에 쓰는 최대 시간(초)
+SEARCH_COLUMN_CHUNK = 2000  # 'all things' 검색에서 한 번에 처리하는 node 구간 크기
+REGEX_SPECIAL_CHARS = set('.^$*+?{}[]\\|()')  # 'all things' 검색어에 있으면 정규식 검색 process에서 실행
+
+# 축소 이미지 캐시 (탭마다, RGBA 기준 추정 크기)
+SCALED_IMAGE_CACHE_BYTES = 128 * 1024 * 1024
+
+# 화면 캔버스 타일 렌더링 (보이는 영역 + 주변 TILE_MARGIN 픽셀의 타일만 PhotoImage로 생성)
+SCREEN_TILE_SIZE = 512
+SCREEN_TILE_MARGIN = 256
+
+# hover inspect: 마우스 이동 처리 주기 (약 60Hz)
+HOVER_THROTTLE_MS = 16
+
+# layout_text undo/redo 이력 (탭마다 변경 구간만 저장)
+UNDO_BUDGET_BYTES = 16 * 1024 * 1024  # undo + redo 이력의 최대 크기
+UNDO_COMPRESS_THRESHOLD = 4096  # 이보다 긴 변경 구간 문자열은 zlib으로 압축해서 저장
+
+# wireframe overlay 색상 (RGBA). 색상 구분 모드에서는 앞쪽 속성이 우선
+WIREFRAME_COLOR = (0, 160, 255, 200)
+WIREFRAME_STATE_COLORS = [
+    ('clickable', (255, 64, 64, 230)),
+    ('scrollable', (40, 200, 40, 230)),
+    ('focusable', (255, 170, 0, 230)),
+]
+
+# screencap raw 픽셀 포맷 -> (PIL mode, raw mode, bytes per pixel)
+SCREENCAP_PIXEL_FORMATS = {
+    1: ('RGBA', 'RGBA', 4),  # RGBA_8888
+    2: ('RGB', 'RGBX', 4),   # RGBX_8888
+    5: ('RGBA', 'BGRA', 4),  # BGRA_8888
+}
+
+
+class AdbError(Exception):
+    """adb 서버가 FAIL을 응답했거나 프로토콜이 맞지 않는 경우"""
+
+
+class AdbConnectionError(AdbError):
+    """adb 서버 연결 또는 서비스 요청 단계에서 실패한 경우 (디바이스에서 명령이 실행되기 전)"""
+
+
+class AdbClient:
+    """
+    adb 서버(localhost:5037)와 smart-socket 프로토콜로 직접 통신하는 클라이언트.
+    shell:/exec: 연결은 명령 하나가 끝나면 서버가 닫으므로 매번 새로 열고,
+    sync: 연결은 디바이스별 풀에 보관해 재사용한다.
+    """
+
+    def __init__(self, host='127.0.0.1', port=None, timeout=30.0, pool_size=2):
+        self.host = host
+        self.port = port or int(os.environ.get('ANDROID_ADB_SERVER_PORT', 5037))
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.sync_pools = {}  # serial -> [sync 모드 socket]
+        self.pool_lock = threading.Lock()
+
+    def connect(self):
+        return socket.create_connection((self.host, self.port), timeout=self.timeout)
+
+    def send_request(self, sock, request):
+        """4자리 hex 길이 + 요청 문자열 전송 후 OKAY/FAIL 확인"""
+        payload = request.encode('utf-8')
+        sock.sendall(b'%04x' % len(payload) + payload)
+
+        status = self.recv_exact(sock, 4)
+        if status == b'OKAY':
+            return
+        if status == b'FAIL':
+            raise AdbError(self.recv_length_prefixed(sock).decode('utf-8', errors='replace'))
+        raise AdbError(f"알 수 없는 adb 서버 응답: {status!r}")
+
+    def recv_exact(self, sock, size):
+        chunks = []
+        remaining = size
+        while remaining > 0:
+            chunk = sock.recv(remaining)
+            if not chunk:
+                raise AdbError("adb 서버 연결이 끊어졌습니다.")
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b''.join(chunks)
+
+    def recv_length_prefixed(self, sock):
+        length = int(self.recv_exact(sock, 4), 16)
+        return self.recv_exact(sock, length)
+
+    def recv_all(self, sock):
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                return b''.join(chunks)
+            chunks.append(chunk)
+
+    def host_request(self, request):
+        """host: 서비스 요청 후 length-prefixed 응답 반환"""
+        sock = self.connect()
+        try:
+            self.send_request(sock, request)
+            return self.recv_length_prefixed(sock)
+        finally:
+            sock.close()
+
+    def devices(self):
+        """연결된 디바이스 목록 [(serial, state), ...]"""
+        output = self.host_request('host:devices').decode('utf-8', errors='replace')
+        return self.parse_device_list(output)
+
+    def parse_device_list(self, output):
+        devices = []
+        for line in output.splitlines():
+            if '\t' in line:
+                serial, state = line.split('\t', 1)
+                devices.append((serial.strip(), state.strip()))
+        return devices
+
+    def track_devices(self, on_change, stop_event):
+        """
+        host:track-devices 스트림을 읽어 디바이스 목록이 바뀔 때마다 on_change([(serial, state), ...]) 호출.
+        adb 서버가 재시작되면 다시 연결하며, stop_event가 설정될 때까지 반복한다.
+        """
+        retry_delay = TRACK_RETRY_INITIAL_DELAY
+        while not stop_event.is_set():
+            try:
+                sock = self.connect()
+                try:
+                    self.send_request(sock, 'host:track-devices')
+                    # 변경이 있을 때만 데이터가 오므로 timeout 없이 대기
+                    sock.settimeout(None)
+                    retry_delay = TRACK_RETRY_INITIAL_DELAY
+                    while not stop_event.is_set():
+                        output = self.recv_length_prefixed(sock).decode('utf-8', errors='replace')
+                        on_change(self.parse_device_list(output))
+                finally:
+                    sock.close()
+            except (OSError, AdbError, ValueError):
+                if stop_event.wait(retry_delay):
+                    break
+                retry_delay = min(retry_delay * 2, TRACK_RETRY_MAX_DELAY)
+
+    def open_transport(self, serial):
+        """host:transport:<serial>로 디바이스에 연결된 socket 반환"""
+        sock = self.connect()
+        try:
+            self.send_request(sock, f'host:transport:{serial}')
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    def open_service(self, serial, service):
+        """
+        디바이스 서비스 socket 반환. 여기까지의 실패는 명령이 실행되기 전이므로 AdbConnectionError로 알리고,
+        이후 출력을 읽다가 난 오류(timeout 등)는 호출한 쪽에 그대로 전달된다.
+        """
+        try:
+            sock = self.open_transport(serial)
+        except (OSError, AdbError) as e:
+            raise AdbConnectionError(str(e)) from e
+        try:
+            self.send_request(sock, service)
+        except (OSError, AdbError) as e:
+            sock.close()
+            raise AdbConnectionError(str(e)) from e
+        return sock
+
+    def run_service(self, serial, service):
+        """디바이스 서비스 실행 후 연결이 닫힐 때까지의 출력 반환"""
+        sock = self.open_service(serial, service)
+        try:
+            return self.recv_all(sock)
+        finally:
+            sock.close()
+
+    def shell(self, serial, command):
+        """
+        shell v2 프로토콜로 명령 실행 (stdout/stderr/종료 코드를 packet으로 구분해서 받음).
+        반환: subprocess.CompletedProcess (stdout, stderr는 bytes)
+        """
+        sock = self.open_service(serial, f'shell,v2,raw:{command}')
+        try:
+            output = {SHELL_V2_STDOUT: [], SHELL_V2_STDERR: []}
+            while True:
+                header = self.recv_exact(sock, 5)
+                packet_id, length = header[0], struct.unpack('<I', header[1:])[0]
+                data = self.recv_exact(sock, length)
+                if packet_id == SHELL_V2_EXIT:
+                    return subprocess.CompletedProcess(command, data[0], b''.join(output[SHELL_V2_STDOUT]),
+                                                       b''.join(output[SHELL_V2_STDERR]))
+                if packet_id in output:
+                    output[packet_id].append(data)
+        finally:
+            sock.close()
+
+    def exec_out(self, serial, command):
+        return self.run_service(serial, f'exec:{command}')
+
+    def acquire_sync(self, serial):
+        """풀에서 sync 연결을 꺼내거나 새로 연결 (반환값: (socket, 풀에서 꺼냈는지 여부))"""
+        with self.pool_lock:
+            pool = self.sync_pools.get(serial)
+            if pool:
+                return pool.pop(), True
+
+        sock = self.open_transport(serial)
+        try:
+            self.send_request(sock, 'sync:')
+        except Exception:
+            sock.close()
+            raise
+        return sock, False
+
+    def release_sync(self, serial, sock):
+        with self.pool_lock:
+            pool = self.sync_pools.setdefault(serial, [])
+            if len(pool) < self.pool_size:
+                pool.append(sock)
+                return
+        self.close_sync(sock)
+
+    def close_sync(self, sock):
+        try:
+            sock.sendall(b'QUIT' + struct.pack('<I', 0))
+        except OSError:
+            pass
+        sock.close()
+
+    def pull(self, serial, remote_path):
+        """sync RECV로 디바이스 파일 내용을 메모리로 읽기"""
+        sock, from_pool = self.acquire_sync(serial)
+        try:
+            data = self.sync_recv(sock, remote_path)
+        except (OSError, AdbError):
+            sock.close()
+            # 풀에 있던 연결이 이미 끊어졌을 수 있으므로 새 연결로 재시도
+            if from_pool:
+                return self.pull(serial, remote_path)
+            raise
+        self.release_sync(serial, sock)
+        return data
+
+    def sync_recv(self, sock, remote_path):
+        path = remote_path.encode('utf-8')
+        sock.sendall(b'RECV' + struct.pack('<I', len(path)) + path)
+
+        chunks = []
+        while True:
+            header = self.recv_exact(sock, 8)
+            chunk_id, length = header[:4], struct.unpack('<I', header[4:])[0]
+            if chunk_id == b'DATA':
+                chunks.append(self.recv_exact(sock, length))
+            elif chunk_id == b'DONE':
+                return b''.join(chunks)
+            elif chunk_id == b'FAIL':
+                message = self.recv_exact(sock, length).decode('utf-8', errors='replace')
+                raise AdbError(f"FAIL {remote_path}: {message}")
+            else:
+                raise AdbError(f"알 수 없는 sync 응답: {chunk_id!r}")
+
+    def invalidate(self, serial):
+        """디바이스의 풀 연결 정리 (디바이스가 끊어졌거나 재연결된 경우)"""
+        with self.pool_lock:
+            pool = self.sync_pools.pop(serial, [])
+        for sock in pool:
+            self.close_sync(sock)
+
+    def close(self):
+        with self.pool_lock:
+            serials = list(self.sync_pools)
+        for serial in serials:
+            self.invalidate(serial)
+
+
+def unescape_xml(value):
+    """XML 속성 값의 entity 복원"""
+    if '&' not in value:
+        return value
+
+    def replace_entity(m):
+        entity = m.group(1)
+        if entity.startswith('#x'):
+            return chr(int(entity[2:], 16))
+        if entity.startswith('#'):
+            return chr(int(entity[1:]))
+        return XML_ENTITIES[entity]
+
+    return XML_ENTITY_PATTERN.sub(replace_entity, value)
+
+
+class Rect(namedtuple('Rect', ['x1', 'y1', 'x2', 'y2'])):
+    """bounds 형식과 관계없이 정규화된 정수 사각형 (좌상단, 우하단 좌표)"""
+    __slots__ = ()
+
+    @property
+    def width(self):
+        return self.x2 - self.x1
+
+    @property
+    def height(self):
+        return self.y2 - self.y1
+
+    @property
+    def area(self):
+        return max(0, self.x2 - self.x1) * max(0, self.y2 - self.y1)
+
+    def contains(self, x, y):
+        return self.x1 <= x <= self.x2 and self.y1 <= y <= self.y2
+
+    def intersects(self, other):
+        return self.x1 <= other.x2 and other.x1 <= self.x2 and self.y1 <= other.y2 and other.y1 <= self.y2
+
+
+class BoundsCodec:
+    """
+    덤프마다 처음 나온 bounds 값으로 형식을 감지하고, 이후에는 해당 형식의 패턴으로만 파싱.
+    형식이 다른 덤프를 같은 세션에서 열어도 전역 설정을 바꿀 필요가 없다.
+    """
+
+    def __init__(self, bounds_format=None):
+        self.format = bounds_format
+
+    def detect(self, value):
+        for bounds_format, pattern in BOUNDS_FORMAT_PATTERNS.items():
+            if pattern.fullmatch(value):
+                return bounds_format
+        return None
+
+    def parse(self, value):
+        """bounds 속성 값을 Rect로 변환 (형식을 알 수 없으면 None)"""
+        m = BOUNDS_FORMAT_PATTERNS[self.format].fullmatch(value) if self.format else None
+        if m is None:
+            bounds_format = self.detect(value)
+            if bounds_format is None:
+                return None
+            if self.format is None:
+                self.format = bounds_format
+            m = BOUNDS_FORMAT_PATTERNS[bounds_format].fullmatch(value)
+        else:
+            bounds_format = self.format
+
+        a, b, c, d = map(int, m.groups())
+        if bounds_format == 'xywh':
+            return Rect(a, b, a + c, b + d)
+        return Rect(a, b, c, d)
+
+
+class LayoutNode:
+    """레이아웃 덤프의 node 하나 (속성, 부모/자식 링크, 텍스트 라인 번호, 정수 bounds)"""
+    __slots__ = ('node_id', 'attrib', 'parent', 'children', 'depth', 'line_num', 'bounds')
+
+    def __init__(self, node_id, attrib, parent, line_num, bounds):
+        self.node_id = node_id
+        self.attrib = attrib
+        self.parent = parent
+        self.children = []
+        self.depth = parent.depth + 1 if parent else 0
+        self.line_num = line_num
+        self.bounds = bounds  # Rect 또는 None
+
+    @property
+    def area(self):
+        return self.bounds.area
+
+    def contains(self, x, y):
+        return self.bounds is not None and self.bounds.contains(x, y)
+
+
+class BoundsGrid:
+    """
+    node bounds에 대한 균일 격자 공간 인덱스.
+    격자 칸을 많이 덮는 큰 node(전체 화면 컨테이너 등)는 칸마다 넣지 않고 별도 목록에서 확인한다.
+    """
+
+    def __init__(self, nodes, cells_per_axis=GRID_CELLS_PER_AXIS, large_node_cells=GRID_LARGE_NODE_CELLS):
+        self.cells = {}  # (cx, cy) -> [node]
+        self.large_nodes = []
+        self.cells_per_axis = cells_per_axis
+
+        bounded = [node for node in nodes if node.bounds]
+        if not bounded:
+            self.origin_x = self.origin_y = 0
+            self.cell_size = 1
+            return
+
+        self.origin_x = min(node.bounds.x1 for node in bounded)
+        self.origin_y = min(node.bounds.y1 for node in bounded)
+        extent = max(max(node.bounds.x2 for node in bounded) - self.origin_x,
+                     max(node.bounds.y2 for node in bounded) - self.origin_y)
+        self.cell_size = max(1, extent // cells_per_axis + 1)
+
+        for node in bounded:
+            cx1, cy1, cx2, cy2 = self.cell_range(*node.bounds)
+            if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > large_node_cells:
+                self.large_nodes.append(node)
+                continue
+            for cx in range(cx1, cx2 + 1):
+                for cy in range(cy1, cy2 + 1):
+                    self.cells.setdefault((cx, cy), []).append(node)
+
+    def cell_of(self, x, y):
+        return (x - self.origin_x) // self.cell_size, (y - self.origin_y) // self.cell_size
+
+    def cell_range(self, x1, y1, x2, y2):
+        cx1, cy1 = self.cell_of(min(x1, x2), min(y1, y2))
+        cx2, cy2 = self.cell_of(max(x1, x2), max(y1, y2))
+        return cx1, cy1, cx2, cy2
+
+    def nodes_at(self, x, y):
+        """좌표를 포함하는 모든 node (바깥쪽/면적이 큰 node부터, 같으면 문서 순서)"""
+        candidates = self.cells.get(self.cell_of(x, y), []) + self.large_nodes
+        hits = [node for node in candidates if node.contains(x, y)]
+        hits.sort(key=lambda node: (-node.area, node.node_id))
+        return hits
+
+    def nodes_in_rect(self, rect):
+        """사각형과 겹치는 모든 node (중복 없이)"""
+        cx1, cy1, cx2, cy2 = self.cell_range(*rect)
+        found = {node.node_id: node for node in self.large_nodes}
+        for cx in range(max(cx1, 0), min(cx2, self.cells_per_axis) + 1):
+            for cy in range(max(cy1, 0), min(cy2, self.cells_per_axis) + 1):
+                for node in self.cells.get((cx, cy), ()):
+                    found[node.node_id] = node
+        return [node for node in found.values() if node.bounds.intersects(rect)]
+
+    def smallest_at(self, x, y):
+        """좌표를 포함하는 node 중 면적이 가장 작은 node (면적이 같으면 문서 순서상 앞쪽)"""
+        best_node = None
+        for node in self.cells.get(self.cell_of(x, y), []) + self.large_nodes:
+            if node.contains(x, y) and (best_node is None or
+                                        (node.area, node.node_id) < (best_node.area, best_node.node_id)):
+                best_node = node
+        return best_node
+
+
+class LayoutModel:
+    """
+    캡처마다 한 번 만드는 레이아웃 node 트리.
+    layout_text에 표시되는 pretty print 텍스트의 라인 번호와 node를 연결해
+    클릭/검색 때마다 텍스트 전체를 다시 정규식으로 훑지 않도록 한다.
+    """
+
+    def __init__(self, lines):
+        self.lines = lines  # layout_text의 라인 목록 (0번 인덱스 = 1번 라인)
+        # find_text용 전체 문자열과 라인 시작 offset (worker thread에서 읽기만 하도록 생성 시 만들어 둠)
+        self.text = '\n'.join(lines)
+        self.line_offsets = []
+        offset = 0
+        for line in lines:
+            self.line_offsets.append(offset)
+            offset += len(line) + 1
+        self.nodes = []  # 문서 순서 (node_id = 인덱스)
+        self.roots = []
+        self.line_to_node = {}
+        self.grid = None  # 클릭 hit-test용 공간 인덱스 (build_indexes에서 생성)
+        self.bounds_codec = BoundsCodec()  # 덤프별 bounds 형식 감지
+        self.attr_index = {}  # 속성 이름 -> {값 -> node_id 집합}
+        self.columns = {}  # 'all things' 검색 속성 이름 -> [(node_id, 값)]
+        self.screen_rect = Rect(0, 0, 0, 0)  # selector의 % 좌표 기준 (전체 node bounds 범위)
+
+    def add_node(self, attrib, line_num, parent):
+        bounds = self.bounds_codec.parse(attrib['bounds']) if 'bounds' in attrib else None
+        node = LayoutNode(len(self.nodes), attrib, parent, line_num, bounds)
+        self.nodes.append(node)
+        if parent:
+            parent.children.append(node)
+        else:
+            self.roots.append(node)
+        self.line_to_node[line_num] = node
+        return node
+
+    @classmethod
+    def from_text(cls, text):
+        """
+        pretty print 된 레이아웃 텍스트를 expat으로 한 번 파싱해서 모델 생성 (편집된 텍스트에도 사용).
+        속성 값에 줄바꿈(&#10; 또는 줄바꿈 문자 그대로)이 있어도 node의 라인 번호는 시작 태그의 라인을 따른다.
+        편집 중이라 XML이 깨진 텍스트는 scan_lines로 라인 단위로 훑는다.
+        """
+        lines = text.split('\n')
+        model = cls(lines)
+        stack = []  # 열려 있는 태그의 node (node 태그가 아니면 None)
+
+        # 문서에 선언된 encoding과 상관없이 str을 UTF-8로 넘김
+        parser = expat.ParserCreate(encoding='utf-8')
+
+        def start_element(tag, attrib):
+            node = None
+            if tag == 'node':
+                parent = next((open_node for open_node in reversed(stack) if open_node), None)
+                node = model.add_node(attrib, parser.CurrentLineNumber, parent)
+            stack.append(node)
+
+        def end_element(tag):
+            stack.pop()
+
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
+        try:
+            parser.Parse(text.encode('utf-8'), True)
+        except expat.ExpatError:
+            model = cls(lines)
+            model.scan_lines()
+
+        model.build_indexes()
+        return model
+
+    def scan_lines(self):
+        """XML로 파싱할 수 없는 텍스트용: 한 줄에 태그 하나씩 있다고 보고 라인 단위로 node 추가"""
+        stack = []  # 열려 있는 태그의 node (node 태그가 아니면 None)
+
+        for line_num, line in enumerate(self.lines, start=1):
+            stripped = line.strip()
+            if not stripped.startswith('<') or stripped.startswith('<?') or stripped.startswith('<!'):
+                continue
+
+            if stripped.startswith('</'):
+                if stack:
+                    stack.pop()
+                continue
+
+            tag_match = XML_TAG_LINE_PATTERN.match(stripped)
+            if not tag_match:
+                continue
+
+            node = None
+            if tag_match.group(1) == 'node':
+                attrib = {name: unescape_xml(value) for name, value in XML_ATTRIBUTE_PATTERN.findall(stripped)}
+                parent = next((open_node for open_node in reversed(stack) if open_node), None)
+                node = self.add_node(attrib, line_num, parent)
+
+            # 자식이 없는 태그(<node .../>, <tag>text</tag>)는 바로 닫힘
+            if not stripped.endswith('/>') and '</' not in stripped:
+                stack.append(node)
+
+    def build_indexes(self):
+        """node가 모두 추가된 후 조회용 인덱스 생성"""
+        self.grid = BoundsGrid(self.nodes)
+
+        bounded = [node.bounds for node in self.nodes if node.bounds]
+        if bounded:
+            self.screen_rect = Rect(0, 0, max(bounds.x2 for bounds in bounded), max(bounds.y2 for bounds in bounded))
+
+        # 속성 값 -> node_id 역색인
+        self.attr_index = {}
+        for node in self.nodes:
+            for attr in INDEXED_ATTRIBUTES:
+                value = node.attrib.get(attr)
+                if value is not None:
+                    self.attr_index.setdefault(attr, {}).setdefault(value, set()).add(node.node_id)
+
+        # 'all things' 검색 대상 속성 값을 열 단위로 미리 추출
+        self.columns = {attr: [(node.node_id, node.attrib[attr]) for node in self.nodes if attr in node.attrib]
+                        for attr in self.search_attributes}
+
+    @property
+    def search_attributes(self):
+        """'all things' 검색 대상 속성 이름 (g_attributes 순서, content-desc 계열은 덤프에 맞춤)"""
+        attributes = []
+        for attr in g_attributes:
+            name = attr.rstrip('=')
+            attributes.append(self.content_desc_attribute if name == var_content_desc else name)
+        return attributes
+
+    @property
+    def content_desc_attribute(self):
+        """덤프에 실제로 있는 content-desc 계열 속성 이름 (일반 덤프: content-desc, stp 덤프: talkback)"""
+        if var_content_desc in self.attr_index:
+            return var_content_desc
+        if 'talkback' in self.attr_index:
+            return 'talkback'
+        return 'content-desc'
+
+    def find_by_attributes(self, criteria):
+        """{속성: 값} 조건을 모두 만족하는 node 목록 (속성 인덱스의 교집합, 문서 순서)"""
+        id_sets = []
+        for attr, value in criteria.items():
+            node_ids = self.attr_index.get(attr, {}).get(value)
+            if not node_ids:
+                return []
+            id_sets.append(node_ids)
+        if not id_sets:
+            return []
+
+        # 가장 작은 집합부터 교집합
+        id_sets.sort(key=len)
+        matched_ids = id_sets[0].intersection(*id_sets[1:])
+        return [self.nodes[node_id] for node_id in sorted(matched_ids)]
+
+    def find_text(self, term):
+        """문서 전체에서 term이 나오는 위치 [(줄 번호, 열)] (겹치지 않게, Text.search를 반복한 것과 같은 순서)"""
+        return list(self.iter_find_text(term))
+
+    def iter_find_text(self, term):
+        """find_text의 generator 버전 (백그라운드 검색에서 결과를 나눠 받을 때 사용)"""
+        start = self.text.find(term)
+        while start != -1:
+            line_index = bisect_right(self.line_offsets, start) - 1
+            yield line_index + 1, start - self.line_offsets[line_index]
+            start = self.text.find(term, start + len(term))
+
+    def descendants(self, node):
+        """node의 모든 자손 (문서 순서)"""
+        stack = list(reversed(node.children))
+        while stack:
+            child = stack.pop()
+            yield child
+            stack.extend(reversed(child.children))
+
+    def select(self, query):
+        """selector 쿼리에 맞는 node 목록 (문서 순서)"""
+        return LayoutSelector(query).evaluate(self)
+
+    def search_columns(self, search_val):
+        """
+        'all things' 검색: 정규식을 한 번만 컴파일해 속성 값 열에 적용
+        (잘못된 정규식이면 같은 열에서 일반 문자열 포함 검색).
+        반환: [(node, 매칭된 속성 이름, (start, end))] - node마다 검색 속성 순서상 첫 매칭, 문서 순서
+        """
+        return list(self.iter_search_columns(search_val))
+
+    def iter_search_columns(self, search_val):
+        """search_columns의 generator 버전 (node 구간마다 열 단위로 검색해 문서 순서로 내보냄)"""
+        try:
+            pattern_search = re.compile(search_val, re.IGNORECASE).search
+
+            def find_span(value):
+                m = pattern_search(value)
+                return m.span() if m else None
+        except re.error:
+            def find_span(value):
+                start = value.find(search_val)
+                return (start, start + len(search_val)) if start != -1 else None
+
+        search_attributes = self.search_attributes
+        for chunk_start in range(0, len(self.nodes), SEARCH_COLUMN_CHUNK):
+            chunk_end = chunk_start + SEARCH_COLUMN_CHUNK
+            matches = {}  # node_id -> (속성 이름, span)
+            for attr in search_attributes:
+                column = self.columns.get(attr, ())
+                begin = bisect_left(column, (chunk_start,))
+                end = bisect_left(column, (chunk_end,))
+                for node_id, value in column[begin:end]:
+                    if node_id in matches:
+                        continue
+                    span = find_span(value)
+                    if span is not None:
+                        matches[node_id] = (attr, span)
+
+            for node_id, (attr, span) in sorted(matches.items()):
+                yield self.nodes[node_id], attr, span
+
+    def node_at_line(self, line_num):
+        return self.line_to_node.get(line_num)
+
+    def find_smallest_at(self, x, y):
+        """좌표를 포함하는 node 중 면적이 가장 작은 node (면적이 같으면 앞쪽 라인)"""
+        return self.grid.smallest_at(x, y)
+
+    def find_all_at(self, x, y):
+        """좌표를 포함하는 모든 node (바깥쪽부터 안쪽 순서)"""
+        return self.grid.nodes_at(x, y)
+
+
+class SelectorError(ValueError):
+    """selector 쿼리 문법 오류"""
+
+
+class SelectorStep:
+    """selector의 한 단계 (타입, 속성 조건, 위치 조건)"""
+
+    def __init__(self, combinator):
+        self.combinator = combinator  # 앞 단계와의 관계: None(첫 단계), ' '(자손), '>'(자식)
+        self.type_name = None
+        self.attr_conditions = []  # (속성, 연산자, 값 또는 컴파일된 정규식)
+        self.spatial_conditions = []  # (종류, 좌표 인자 문자열 목록)
+
+    def compile(self, model):
+        """모델의 화면 크기를 반영해 위치 조건을 Rect로 변환하고, 인덱스로 찾을 수 있는 조건을 분리"""
+        self.rects = [(kind, self.resolve_coords(args, model.screen_rect)) for kind, args in self.spatial_conditions]
+
+        self.index_criteria = {}
+        for attr, op, value in self.attr_conditions:
+            if op == '=' and attr in INDEXED_ATTRIBUTES:
+                self.index_criteria[attr] = value
+
+        # 인덱스 조건이 있으면 후보 node_id 집합을 미리 구해 빠르게 거름
+        self.allowed_ids = None
+        if self.index_criteria:
+            self.allowed_ids = {node.node_id for node in model.find_by_attributes(self.index_criteria)}
+
+        # 타입은 matches()와 같은 규칙(전체 이름 또는 '.' 뒤의 이름)으로 class 인덱스에서 후보를 모음
+        if self.type_name and self.type_name not in ('*', 'node'):
+            suffix = '.' + self.type_name
+            class_ids = set()
+            for class_name, node_ids in model.attr_index.get('class', {}).items():
+                if class_name == self.type_name or class_name.endswith(suffix):
+                    class_ids.update(node_ids)
+            self.allowed_ids = class_ids if self.allowed_ids is None else self.allowed_ids & class_ids
+
+    def resolve_coords(self, args, screen):
+        values = []
+        for index, arg in enumerate(args):
+            if arg.endswith('%'):
+                size = screen.width if index % 2 == 0 else screen.height
+                values.append(int(size * float(arg[:-1]) / 100))
+            else:
+                values.append(int(float(arg)))
+        if len(values) == 2:
+            return Rect(values[0], values[1], values[0], values[1])
+        return Rect(*values)
+
+    def matches(self, node):
+        if self.allowed_ids is not None and node.node_id not in self.allowed_ids:
+            return False
+
+        if self.type_name and self.type_name not in ('*', 'node'):
+            node_class = node.attrib.get('class', '')
+            if node_class != self.type_name and not node_class.endswith('.' + self.type_name):
+                return False
+
+        for attr, op, value in self.attr_conditions:
+            attr_value = node.attrib.get(attr)
+            if op == 'exists':
+                matched = attr_value is not None
+            elif attr_value is None:
+                matched = op == '!='
+            elif op == '=':
+                matched = attr_value == value
+            elif op == '!=':
+                matched = attr_value != value
+            elif op == '*=':
+                matched = value in attr_value
+            elif op == '^=':
+                matched = attr_value.startswith(value)
+            elif op == '$=':
+                matched = attr_value.endswith(value)
+            else:  # '~='
+                matched = value.search(attr_value) is not None
+            if not matched:
+                return False
+
+        for kind, rect in self.rects:
+            bounds = node.bounds
+            if bounds is None:
+                return False
+            if kind == 'intersects' and not bounds.intersects(rect):
+                return False
+            if kind == 'within' and not (rect.x1 <= bounds.x1 and rect.y1 <= bounds.y1 and
+                                         bounds.x2 <= rect.x2 and bounds.y2 <= rect.y2):
+                return False
+            if kind == 'contains' and not bounds.contains(rect.x1, rect.y1):
+                return False
+        return True
+
+
+class LayoutSelector:
+    """
+    레이아웃 트리에 대한 CSS 형식의 간단한 selector 쿼리.
+      예) [resource-id="com.app:id/list"] [clickable=true][text~=/Pay/i]:intersects(0,50%,100%,100%)
+    - 단계 구분: 공백(자손), '>'(자식)
+    - 타입: *, node, 클래스 이름 (전체 이름 또는 마지막 '.' 뒤의 이름)
+    - 속성 조건: [attr], [attr=v], [attr!=v], [attr*=v], [attr^=v], [attr$=v], [attr~=/regex/i]
+    - 위치 조건: :intersects(x1,y1,x2,y2), :within(x1,y1,x2,y2), :contains(x,y) (px 또는 화면 크기 기준 %)
+    평가 시 속성 인덱스/공간 인덱스로 마지막 단계의 후보를 먼저 좁힌 뒤 조상 방향으로 확인한다.
+    """
+
+    IDENT_PATTERN = re.compile(r'[\w.$-]+|\*')
+    ATTR_NAME_PATTERN = re.compile(r'[\w:.-]+')
+    OPERATOR_PATTERN = re.compile(r'!=|\*=|\^=|\$=|~=|=')
+    BARE_VALUE_PATTERN = re.compile(r'[^\]\s]+')
+    PSEUDO_PATTERN = re.compile(r':(intersects|within|contains)\(([^)]*)\)')
+    COORD_PATTERN = re.compile(r'-?\d+(\.\d+)?%?')
+
+    def __init__(self, query):
+        self.query = query.strip()
+        self.pos = 0
+        self.steps = []
+        self.parse()
+
+    def error(self, message):
+        raise SelectorError(f"{message} (위치 {self.pos}: {self.query[self.pos:self.pos + 20]!r})")
+
+    def skip_whitespace(self):
+        start = self.pos
+        while self.pos < len(self.query) and self.query[self.pos].isspace():
+            self.pos += 1
+        return self.pos > start
+
+    def parse(self):
+        if not self.query:
+            raise SelectorError("selector가 비어 있습니다.")
+
+        combinator = None
+        while True:
+            self.steps.append(self.parse_step(combinator))
+            had_space = self.skip_whitespace()
+            if self.pos >= len(self.query):
+                break
+            if self.query[self.pos] == '>':
+                self.pos += 1
+                self.skip_whitespace()
+                combinator = '>'
+            elif had_space:
+                combinator = ' '
+            else:
+                self.error("알 수 없는 문자")
+
+    def parse_step(self, combinator):
+        step = SelectorStep(combinator)
+
+        m = self.IDENT_PATTERN.match(self.query, self.pos)
+        if m:
+            step.type_name = m.group()
+            self.pos = m.end()
+
+        while self.pos < len(self.query):
+            char = self.query[self.pos]
+            if char == '[':
+                step.attr_conditions.append(self.parse_attr_condition())
+            elif char == ':':
+                m = self.PSEUDO_PATTERN.match(self.query, self.pos)
+                if not m:
+                    self.error("알 수 없는 위치 조건")
+                args = [arg.strip() for arg in m.group(2).split(',')]
+                expected = 2 if m.group(1) == 'contains' else 4
+                if len(args) != expected or not all(self.COORD_PATTERN.fullmatch(arg) for arg in args):
+                    self.error(f":{m.group(1)}에는 좌표 {expected}개가 필요합니다")
+                step.spatial_conditions.append((m.group(1), args))
+                self.pos = m.end()
+            else:
+                break
+
+        if step.type_name is None and not step.attr_conditions and not step.spatial_conditions:
+            self.error("조건이 없는 단계")
+        return step
+
+    def parse_attr_condition(self):
+        self.pos += 1  # '['
+        self.skip_whitespace()
+        m = self.ATTR_NAME_PATTERN.match(self.query, self.pos)
+        if not m:
+            self.error("속성 이름이 필요합니다")
+        attr = m.group()
+        self.pos = m.end()
+        self.skip_whitespace()
+
+        if self.query.startswith(']', self.pos):
+            self.pos += 1
+            return attr, 'exists', None
+
+        m = self.OPERATOR_PATTERN.match(self.query, self.pos)
+        if not m:
+            self.error("연산자가 필요합니다")
+        op = m.group()
+        self.pos = m.end()
+        self.skip_whitespace()
+
+        value, is_regex_literal, flags = self.parse_value()
+        self.skip_whitespace()
+        if not self.query.startswith(']', self.pos):
+            self.error("']'가 필요합니다")
+        self.pos += 1
+
+        if op == '~=':
+            try:
+                value = re.compile(value, re.IGNORECASE if 'i' in flags else 0)
+            except re.error as e:
+                raise SelectorError(f"잘못된 정규식: {e}")
+        elif is_regex_literal:
+            self.error("/정규식/은 ~= 연산자에만 사용할 수 있습니다")
+        return attr, op, value
+
+    def parse_value(self):
+        """값 읽기: "따옴표", '따옴표', /정규식/플래그, 공백 없는 값"""
+        if self.pos >= len(self.query):
+            self.error("값이 필요합니다")
+
+        quote = self.query[self.pos]
+        if quote in ('"', "'", '/'):
+            chars = []
+            self.pos += 1
+            while self.pos < len(self.query) and self.query[self.pos] != quote:
+                if self.query[self.pos] == '\\' and self.pos + 1 < len(self.query):
+                    # 따옴표 안의 escape는 풀고, 정규식 안의 escape는 정규식에 그대로 전달
+                    if quote != '/' or self.query[self.pos + 1] == '/':
+                        self.pos += 1
+                    else:
+                        chars.append(self.query[self.pos])
+                        self.pos += 1
+                chars.append(self.query[self.pos])
+                self.pos += 1
+            if self.pos >= len(self.query):
+                self.error("닫는 따옴표가 없습니다")
+            self.pos += 1
+
+            flags = ''
+            if quote == '/':
+                while self.pos < len(self.query) and self.query[self.pos].isalpha():
+                    flags += self.query[self.pos]
+                    self.pos += 1
+            return ''.join(chars), quote == '/', flags
+
+        m = self.BARE_VALUE_PATTERN.match(self.query, self.pos)
+        if m is None:
+            self.error("값이 필요합니다")
+        self.pos = m.end()
+        return m.group(), False, ''
+
+    def evaluate(self, model):
+        """쿼리에 맞는 node 목록 (문서 순서)"""
+        return list(self.iter_matches(model))
+
+    def iter_matches(self, model):
+        """evaluate의 generator 버전 (후보를 문서 순서로 정렬한 뒤 맞는 node를 하나씩 내보냄)"""
+        for step in self.steps:
+            step.compile(model)
+
+        target = self.steps[-1]
+        candidates = sorted(self.plan_candidates(model), key=lambda node: node.node_id)
+
+        memo = {}
+        for node in candidates:
+            if target.matches(node) and self.matches_ancestors(node, len(self.steps) - 1, memo):
+                yield node
+
+    def plan_candidates(self, model):
+        """마지막 단계의 후보 node: 속성 인덱스 > 공간 인덱스 > 인덱스 조건이 있는 조상 단계의 서브트리 > 전체 순서로 선택"""
+        target = self.steps[-1]
+        if target.allowed_ids is not None:
+            return [model.nodes[node_id] for node_id in target.allowed_ids]
+
+        for kind, rect in target.rects:
+            if kind == 'contains':
+                return model.grid.nodes_at(rect.x1, rect.y1)
+            return model.grid.nodes_in_rect(rect)
+
+        # 선택적인 조건이 있는 가장 가까운 조상 단계의 서브트리만 탐색
+        for step in reversed(self.steps[:-1]):
+            if step.allowed_ids is not None:
+                # 이미 포함된 서브트리는 다시 탐색하지 않도록 문서 순서로 처리
+                candidates = {}
+                for node_id in sorted(step.allowed_ids):
+                    if node_id in candidates:
+                        continue
+                    for node in model.descendants(model.nodes[node_id]):
+                        candidates[node.node_id] = node
+                return list(candidates.values())
+
+        return model.nodes
+
+    def matches_ancestors(self, node, step_index, memo):
+        """node가 step_index 단계에 맞을 때, 앞 단계들이 조상 방향으로 만족되는지 확인"""
+        if step_index == 0:
+            return True
+
+        key = (node.node_id, step_index)
+        if key in memo:
+            return memo[key]
+
+        previous = self.steps[step_index - 1]
+        result = False
+        if self.steps[step_index].combinator == '>':
+            parent = node.parent
+            result = (parent is not None and previous.matches(parent) and
+                      self.matches_ancestors(parent, step_index - 1, memo))
+        else:
+            result = self.has_matching_ancestor(node.parent, step_index - 1, memo)
+
+        memo[key] = result
+        return result
+
+    def has_matching_ancestor(self, node, step_index, memo):
+        """node 자신 또는 조상 중 step_index 단계까지 만족하는 node가 있는지 (지나간 경로의 결과를 모두 기억)"""
+        step = self.steps[step_index]
+        path = []
+        result = False
+        while node is not None:
+            key = ('up', node.node_id, step_index)
+            if key in memo:
+                result = memo[key]
+                break
+            path.append(node)
+            if step.matches(node) and self.matches_ancestors(node, step_index, memo):
+                result = True
+                break
+            node = node.parent
+
+        for visited in path:
+            memo[('up', visited.node_id, step_index)] = result
+        return result
+
+
+def regex_search_worker(conn):
+    """
+    정규식이 들어간 검색을 실행하는 process의 본체. _sre는 매칭 중 GIL을 놓지 않으므로
+    thread가 아닌 별도 process에서 실행해야 UI가 멈추지 않고, 취소 시 process를 종료할 수 있다.
+    요청: (레이아웃 텍스트, 검색 종류('all' 또는 'selector'), 검색어)
+    응답: ('batch', [(node_id, 상세)]) 여러 번 후 ('done', None), 실패 시 ('error', 예외)
+    """
+    model = None
+    while True:
+        try:
+            text, search_type, query = conn.recv()
+        except EOFError:
+            return
+
+        try:
+            # 같은 텍스트에 대한 검색이 이어지는 경우가 많으므로 마지막 모델을 재사용
+            if model is None or model.text != text:
+                model = LayoutModel.from_text(text)
+            if search_type == 'all':
+                results = ((node.node_id, (attr, span)) for node, attr, span in model.iter_search_columns(query))
+            else:
+                results = ((node.node_id, None) for node in LayoutSelector(query).iter_matches(model))
+
+            batch = []
+            last_flush = time.monotonic()
+            for result in results:
+                batch.append(result)
+                if len(batch) >= SEARCH_BATCH_SIZE or time.monotonic() - last_flush >= SEARCH_POLL_MS / 1000:
+                    conn.send(('batch', batch))
+                    batch = []
+                    last_flush = time.monotonic()
+            conn.send(('batch', batch))
+            conn.send(('done', None))
+        except Exception as e:
+            conn.send(('error', e))
+
+
+class RegexSearchProcess:
+    """
+    탭마다 하나씩 두는 정규식 검색 process (regex_search_worker).
+    검색 도중 취소하면 process를 종료하고, 다음 검색 때 새로 시작한다.
+    """
+
+    def __init__(self):
+        self.process = None
+        self.conn = None
+        self.busy = False  # process가 검색 중인지 (결과를 끝까지 받기 전)
+        self.generation = 0  # cancel할 때마다 증가 (취소 전에 만든 검색은 시작하지 않음)
+        self.lock = threading.Lock()
+
+    def start(self):
+        parent_conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=regex_search_worker, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+    def iter_results(self, model, search_type, query):
+        """
+        model의 텍스트로 process에서 검색해 (node, 상세)를 차례로 내보내는 iterator.
+        호출한 thread에서 generation을 기록해 두고, 실제 요청은 iterator를 처음 읽는 worker thread에서 보낸다.
+        """
+        return self.receive_results(self.generation, model, search_type, query)
+
+    def receive_results(self, generation, model, search_type, query):
+        with self.lock:
+            if generation != self.generation:
+                return
+            if self.process is None or not self.process.is_alive():
+                if self.conn is not None:
+                    self.conn.close()
+                self.start()
+            conn = self.conn
+            self.busy = True
+            conn.send((model.text, search_type, query))
+
+        try:
+            while True:
+                # 검색 중에 process가 종료되면(취소) EOFError/OSError가 발생
+                kind, payload = conn.recv()
+                if kind == 'batch':
+                    for node_id, detail in payload:
+                        yield model.nodes[node_id], detail
+                else:
+                    with self.lock:
+                        self.busy = False
+                    if kind == 'error':
+                        raise payload
+                    return
+        finally:
+            with self.lock:
+                if conn is self.conn and self.busy:
+                    # 결과를 끝까지 받지 않고 그만 읽는 경우 process에 남은 검색도 종료
+                    self.process.terminate()
+                    self.process = None
+                    self.conn = None
+                    self.busy = False
+                if conn is not self.conn:
+                    conn.close()
+
+    def cancel(self):
+        """진행 중인 검색 취소 (검색 중이면 process를 종료해 매칭 중인 정규식도 바로 멈춤)"""
+        with self.lock:
+            self.generation += 1
+            if self.busy:
+                # 연결은 recv에서 기다리던 쪽이 EOF를 받은 뒤 닫음
+                self.process.terminate()
+                self.process = None
+                self.conn = None
+                self.busy = False
+
+    def close(self):
+        """탭을 닫을 때 process 종료"""
+        self.cancel()
+        with self.lock:
+            if self.process is not None:
+                self.process.terminate()
+                self.conn.close()
+                self.process = None
+                self.conn = None
+
+
+def detect_minidom_escaping():
+    """실행 중인 Python의 minidom이 속성 공백 문자와 텍스트의 따옴표를 escape 하는지 확인"""
+    element = xml.dom.minidom.parseString('<a b="&#10;">"</a>').documentElement.toxml()
+    return '&#10;' in element, '&quot;' in element.split('>', 1)[1]
+
+
+# toprettyxml과 동일한 출력을 만들기 위한 minidom escape 동작 (Python 버전마다 다름)
+MINIDOM_ESCAPES_ATTR_WHITESPACE, MINIDOM_ESCAPES_TEXT_QUOTE = detect_minidom_escaping()
+
+
+def escape_minidom_attr(value):
+    value = value.replace('&', '&amp;').replace('<', '&lt;').replace('"', '&quot;').replace('>', '&gt;')
+    if MINIDOM_ESCAPES_ATTR_WHITESPACE:
+        value = value.replace('\r', '&#13;').replace('\n', '&#10;').replace('\t', '&#9;')
+    return value
+
+
+def escape_minidom_text(value):
+    # ET.tostring -> minidom 재파싱 과정에서 텍스트의 CR은 LF로 정규화됨
+    value = value.replace('\r\n', '\n').replace('\r', '\n')
+    value = value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    if MINIDOM_ESCAPES_TEXT_QUOTE:
+        value = value.replace('"', '&quot;')
+    return value
+
+
+def format_layout_xml(xml_content, indent="  "):
+    """
+    XML을 pull 파싱으로 한 번만 훑으면서 들여쓰기 된 텍스트와 LayoutModel을 함께 생성.
+    출력은 기존 ET.tostring -> minidom.toprettyxml(indent="  ") 결과와 동일하며,
+    namespace가 있는 문서는 ValueError를 발생시켜 호출자가 기존 방식으로 처리하도록 한다.
+    """
+    output = ['<?xml version="1.0" ?>\n']
+    line_num = 2  # 다음에 쓸 라인 번호
+    pending_nodes = []  # (attrib, line_num, parent 프레임) - 모델에 추가할 node
+    stack = []  # [element, 들여쓰기, 자식 태그를 이미 열었는지, 마지막 자식 element, 모델 node 인덱스]
+
+    def write(text):
+        nonlocal line_num
+        output.append(text)
+        line_num += text.count('\n')
+
+    def start_tag(elem, frame_indent, parent_index):
+        if '{' in elem.tag or any('{' in name for name in elem.attrib):
+            raise ValueError("namespace가 있는 XML은 지원하지 않습니다.")
+        node_index = None
+        if elem.tag == 'node':
+            node_index = len(pending_nodes)
+            pending_nodes.append((dict(elem.attrib), line_num, parent_index))
+        attrs = ''.join(f' {name}="{escape_minidom_attr(value)}"' for name, value in elem.attrib.items())
+        return f"{frame_indent}<{elem.tag}{attrs}", node_index
+
+    def write_tail(frame):
+        last_child = frame[3]
+        if last_child is not None:
+            if last_child.tail:
+                write(f"{frame[1]}{indent}{escape_minidom_text(last_child.tail)}\n")
+            # 출력이 끝난 자식은 메모리에서 해제
+            last_child.clear()
+            frame[3] = None
+
+    def parent_node_index():
+        # 아직 출력 전인 프레임은 node 인덱스가 None이므로 자연스럽게 건너뜀
+        for frame in reversed(stack):
+            if frame[4] is not None:
+                return frame[4]
+        return None
+
+    parser = ET.XMLPullParser(events=('start', 'end'))
+
+    def handle_events():
+        for event, elem in parser.read_events():
+            if event == 'start':
+                if stack:
+                    parent = stack[-1]
+                    if not parent[2]:
+                        # 첫 번째 자식이 나왔으므로 부모 태그를 열린 형태로 출력
+                        tag_text, parent[4] = start_tag(parent[0], parent[1], parent_node_index())
+                        write(f"{tag_text}>\n")
+                        parent[2] = True
+                        if parent[0].text:
+                            write(f"{parent[1]}{indent}{escape_minidom_text(parent[0].text)}\n")
+                    else:
+                        write_tail(parent)
+                stack.append([elem, indent * len(stack), False, None, None])
+            else:
+                frame = stack.pop()
+                if not frame[2]:
+                    tag_text, _ = start_tag(elem, frame[1], parent_node_index())
+                    if elem.text:
+                        write(f"{tag_text}>{escape_minidom_text(elem.text)}</{elem.tag}>\n")
+                    else:
+                        write(f"{tag_text}/>\n")
+                else:
+                    write_tail(frame)
+                    write(f"{frame[1]}</{elem.tag}>\n")
+                if stack:
+                    stack[-1][3] = elem
+
+    for offset in range(0, len(xml_content), 65536):
+        parser.feed(xml_content[offset:offset + 65536])
+        handle_events()
+    parser.close()
+    handle_events()
+
+    layout_xml = ''.join(output)
+
+    # 출력하면서 기록한 라인 번호로 모델 생성
+    layout_model = LayoutModel(layout_xml.split('\n'))
+    model_nodes = []
+    for attrib, node_line, parent_index in pending_nodes:
+        parent = model_nodes[parent_index] if parent_index is not None else None
+        model_nodes.append(layout_model.add_node(attrib, node_line, parent))
+    layout_model.build_indexes()
+
+    return layout_xml, layout_model
+
+
+def decode_raw_screencap(raw_data):
+    """screencap raw 출력(헤더 + 픽셀)을 PIL 이미지로 변환"""
+    if len(raw_data) < 12:
+        raise ValueError("screencap raw 출력이 너무 짧습니다.")
+
+    width, height, pixel_format = struct.unpack_from('<III', raw_data, 0)
+    if pixel_format not in SCREENCAP_PIXEL_FORMATS:
+        raise ValueError(f"지원하지 않는 픽셀 포맷입니다: {pixel_format}")
+
+    mode, raw_mode, bytes_per_pixel = SCREENCAP_PIXEL_FORMATS[pixel_format]
+    pixel_size = width * height * bytes_per_pixel
+
+    # Android 9 이상은 colorspace 필드가 추가되어 헤더가 16바이트
+    header_size = len(raw_data) - pixel_size
+    if header_size not in (12, 16):
+        raise ValueError("screencap raw 출력 크기가 헤더와 맞지 않습니다.")
+
+    pixels = memoryview(raw_data)[header_size:]
+    if mode == raw_mode:
+        # RGBA_8888은 버퍼를 복사하지 않고 그대로 참조
+        return Image.frombuffer(mode, (width, height), pixels, 'raw', raw_mode, 0, 1)
+    # frombuffer는 RGBX 버퍼를 RGBX 모드 그대로 매핑해 PNG/BMP로 저장할 수 없으므로 디코딩해서 변환
+    return Image.frombytes(mode, (width, height), pixels, 'raw', raw_mode)
+
+
+def compose_wireframe(image, nodes, scale_ratio, colored=False):
+    """모든 node bounds를 투명 layer 하나에 그린 뒤 축소 이미지 위에 합성한 새 이미지 반환"""
+    layer = Image.new('RGBA', image.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer)
+
+    for node in nodes:
+        bounds = node.bounds
+        if bounds is None or bounds.width <= 0 or bounds.height <= 0:
+            continue
+
+        color = WIREFRAME_COLOR
+        if colored:
+            color = next((state_color for attr, state_color in WIREFRAME_STATE_COLORS
+                          if node.attrib.get(attr) == 'true'), WIREFRAME_COLOR)
+
+        x1 = int(bounds.x1 * scale_ratio)
+        y1 = int(bounds.y1 * scale_ratio)
+        x2 = max(x1, int(bounds.x2 * scale_ratio) - 1)
+        y2 = max(y1, int(bounds.y2 * scale_ratio) - 1)
+        draw.rectangle([x1, y1, x2, y2], outline=color)
+
+    return Image.alpha_composite(image.convert('RGBA'), layer)
+
+
+def tk_char_count(value):
+    """문자열의 Text index 길이 (Python 문자 수와 달리 Tcl 8.6에서는 BMP 밖 문자를 2로 셈)"""
+    if not TK_INDEX_UTF16 or value.isascii():
+        return len(value)
+    return len(value.encode('utf-16-le')) // 2
+
+
+def common_prefix_length(a, b, chunk_size=65536):
+    """두 문자열의 공통 접두사 길이 (chunk 단위로 비교한 뒤 다른 chunk 안에서 이진 탐색)"""
+    limit = min(len(a), len(b))
+    start = 0
+    while start < limit:
+        end = min(start + chunk_size, limit)
+        if a[start:end] != b[start:end]:
+            break
+        start = end
+    else:
+        return limit
+
+    low, high = start, end - 1
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[start:mid] == b[start:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def common_suffix_length(a, b, limit, chunk_size=65536):
+    """두 문자열의 공통 접미사 길이 (최대 limit)"""
+    len_a, len_b = len(a), len(b)
+    matched = 0
+    while matched < limit:
+        end = min(matched + chunk_size, limit)
+        if a[len_a - end:len_a - matched] != b[len_b - end:len_b - matched]:
+            break
+        matched = end
+    else:
+        return limit
+
+    low, high = matched, end - 1
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[len_a - mid:len_a - matched] == b[len_b - mid:len_b - matched]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+EditDelta = namedtuple('EditDelta', 'start removed inserted size')  # removed/inserted: str 또는 zlib 압축된 bytes
+
+
+class UndoJournal:
+    """
+    layout_text 편집 이력. 전체 텍스트 사본 대신 직전 상태와의 변경 구간(공통 접두사/접미사 제외)만 저장하고,
+    긴 변경 구간은 압축한다. undo + redo 이력이 budget_bytes를 넘으면 오래된 undo부터, 그 다음 가장 먼 redo부터 버린다.
+    """
+
+    def __init__(self, budget_bytes=UNDO_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self.text = None  # 마지막으로 기록된 텍스트 (변경 구간 계산 기준)
+        self.undo_deltas = deque()
+        self.redo_deltas = deque()
+        self.size = 0
+
+    @staticmethod
+    def pack(value):
+        if len(value) > UNDO_COMPRESS_THRESHOLD:
+            return zlib.compress(value.encode('utf-8'))
+        return value
+
+    @staticmethod
+    def unpack(value):
+        if isinstance(value, bytes):
+            return zlib.decompress(value).decode('utf-8')
+        return value
+
+    def record(self, text):
+        """현재 텍스트를 기록 (바뀐 것이 있으면 변경 구간을 undo 이력에 추가하고 redo 이력은 비움)"""
+        if self.text is None:
+            self.text = text
+            return False
+        if text == self.text:
+            return False
+
+        prefix = common_prefix_length(self.text, text)
+        suffix = common_suffix_length(self.text, text, min(len(self.text), len(text)) - prefix)
+        removed = self.pack(self.text[prefix:len(self.text) - suffix])
+        inserted = self.pack(text[prefix:len(text) - suffix])
+        self.undo_deltas.append(EditDelta(prefix, removed, inserted, len(removed) + len(inserted) + 64))
+        self.size += self.undo_deltas[-1].size
+
+        while self.redo_deltas:
+            self.size -= self.redo_deltas.pop().size
+        self.text = text
+        self.trim()
+        return True
+
+    def trim(self):
+        """
+        undo + redo 이력 크기가 예산을 넘으면 가장 오래된 undo부터, 그 다음 가장 먼 redo부터 제거
+        (이력이 하나만 남으면 예산을 넘더라도 유지)
+        """
+        while self.size > self.budget_bytes and len(self.undo_deltas) + len(self.redo_deltas) > 1:
+            if len(self.undo_deltas) > 1 or not self.redo_deltas:
+                self.size -= self.undo_deltas.popleft().size
+            else:
+                self.size -= self.redo_deltas.popleft().size
+
+    def set_budget(self, budget_bytes):
+        """예산을 바꾸고 바로 이력 크기를 맞춤"""
+        self.budget_bytes = budget_bytes
+        self.trim()
+
+    def undo(self):
+        """마지막 변경을 되돌림. 반환: 텍스트에 적용할 (시작 offset, 지울 문자열, 넣을 문자열) 또는 None"""
+        if not self.undo_deltas:
+            return None
+        delta = self.undo_deltas.pop()
+        self.redo_deltas.append(delta)
+        return self.apply(delta.start, self.unpack(delta.inserted), self.unpack(delta.removed))
+
+    def redo(self):
+        """되돌린 변경을 다시 적용. 반환 형식은 undo와 같음"""
+        if not self.redo_deltas:
+            return None
+        delta = self.redo_deltas.pop()
+        self.undo_deltas.append(delta)
+        return self.apply(delta.start, self.unpack(delta.removed), self.unpack(delta.inserted))
+
+    def apply(self, start, old, new):
+        self.text = self.text[:start] + new + self.text[start + len(old):]
+        return start, old, new
+
+    def line_col(self, offset):
+        """
+        offset의 Text index용 (줄 번호, 열) - 열은 Tk 문자 수 기준 (tk_char_count).
+        변경 시작 offset 앞부분은 변경 전후가 같으므로 적용 후에 계산해도 됨
+        """
+        line_start = self.text.rfind('\n', 0, offset) + 1
+        return self.text.count('\n', 0, offset) + 1, tk_char_count(self.text[line_start:offset])
+
 
 class ScreenLayoutCapture:
     def __init__(self):
@@ -75,9 +1585,26 @@ class ScreenLayoutCapture:
         # 디바이스 탭 관련 변수
         self.device_tabs = {}  # device_id -> tab_frame 매핑
 
+        # 디바이스 정보 캐시 (device_id -> (조회 시각, 정보 텍스트))
+        self.device_info_cache = {}
+
+        # 줄번호용 폰트 metrics 캐시 (폰트 설정 문자열 -> (줄 높이, 숫자 폭))
+        self.font_metrics_cache = {}
+
+        # adb 서버 직접 연결 클라이언트 (실패 시 adb 프로세스로 fallback)
+        self.adb = AdbClient()
+
+        # 화면/레이아웃 캡처를 Tk 메인 스레드 밖에서 동시에 실행하기 위한 executor
+        self.capture_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="capture")
+
         self.setup_ui()
         self.load_devices()
 
+        # adb track-devices로 디바이스 연결/해제를 감시
+        self.device_states = {}  # device_id -> adb state ('device', 'offline', ...)
+        self.device_watcher_stop = threading.Event()
+        self.start_device_watcher()
+
         # Ctrl+X 조합 감지를 위한 상태 추적
         self.ctrl_pressed = False
         self.root.bind('<KeyPress-Control_L>', self.on_ctrl_press)
@@ -117,6 +1644,9 @@ class ScreenLayoutCapture:
 
         ttk.Label(devices_control_frame, text="Devices :").pack(side=tk.LEFT)
         ttk.Button(devices_control_frame, text="새로고침", command=self.load_devices).pack(side=tk.RIGHT)
+        self.capture_all_button = ttk.Button(devices_control_frame, text="모두 캡처",
+                                             command=self.capture_all_devices)
+        self.capture_all_button.pack(side=tk.RIGHT, padx=(0, 5))
 
         # 디바이스 리스트박스
         listbox_frame = ttk.Frame(device_frame)
@@ -129,7 +1659,7 @@ class ScreenLayoutCapture:
         self.device_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-        #self.device_listbox.bind('<<ListboxSelect>>', self.on_device_select)
+        self.device_listbox.bind('<<ListboxSelect>>', self.on_device_select)
         self.device_listbox.bind('<Double-Button-1>', self.on_device_double_click)
 
         # 선택된 디바이스 정보
@@ -139,8 +1669,8 @@ class ScreenLayoutCapture:
         self.device_info_text = scrolledtext.ScrolledText(info_frame, height=200, wrap=tk.WORD)
         self.device_info_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
-    def create_capture_tab(self, device_id):
-        """특정 디바이스를 위한 화면 캡처 탭 생성"""
+    def create_capture_tab(self, device_id, reload=True, undo_budget_bytes=UNDO_BUDGET_BYTES):
+        """특정 디바이스를 위한 화면 캡처 탭 생성 (undo_budget_bytes: 이 탭의 undo + redo 이력 최대 크기)"""
         capture_tab = ttk.Frame(self.notebook)
 
         # 탭 제목에 X 버튼 추가
@@ -162,11 +1692,15 @@ class ScreenLayoutCapture:
         control_frame = ttk.Frame(capture_tab)
         control_frame.pack(fill=tk.X, padx=10, pady=5)
 
-        ttk.Button(control_frame, text="reload cap",
-                   command=lambda: self.reload_capture(device_id)).pack(side=tk.LEFT, padx=(0, 5))
+        reload_button = ttk.Button(control_frame, text="reload cap",
+                                   command=lambda: self.on_reload_button(device_id))
+        reload_button.pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(control_frame, text="save cap",
                    command=lambda: self.save_capture(device_id)).pack(side=tk.LEFT)
 
+        # 캡처 진행 중 표시
+        reload_progress = ttk.Progressbar(control_frame, mode='indeterminate', length=80)
+
         # 현재 선택된 디바이스 표시
         current_device_label = ttk.Label(control_frame, text=f"디바이스: {device_id}", foreground="green")
         current_device_label.pack(side=tk.RIGHT)
@@ -196,10 +1730,27 @@ class ScreenLayoutCapture:
             ttk.Radiobutton(scale_frame, text=text, variable=scale_var, value=value,
                             command=lambda did=device_id: self.on_scale_change(did)).pack(side=tk.LEFT, padx=5)
 
+        # 전체 node bounds wireframe 표시 (색상 구분: clickable/scrollable/focusable)
+        wireframe_var = tk.BooleanVar(value=False)
+        wireframe_color_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(scale_frame, text="Wireframe", variable=wireframe_var,
+                        command=lambda: self.display_image(device_id)).pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Checkbutton(scale_frame, text="색상 구분", variable=wireframe_color_var,
+                        command=lambda: self.display_image(device_id)).pack(side=tk.LEFT, padx=5)
+
+        # 마우스를 올린 node의 bounds와 주요 속성 표시
+        hover_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(scale_frame, text="Hover", variable=hover_var,
+                        command=lambda: self.clear_hover(device_id)).pack(side=tk.LEFT, padx=(10, 0))
+
         # 좌표 표시 라벨 (요청사항 1)
         coords_label = ttk.Label(screen_frame, text="이미지 Resolution : -, 좌표 : (-,-)")
         coords_label.pack(anchor="w", padx=5, pady=(3, 0))
 
+        # hover 중인 node 정보 표시 라벨
+        hover_status_label = ttk.Label(screen_frame, text="")
+        hover_status_label.pack(anchor="w", padx=5, pady=(3, 0))
+
         # 요청사항: x,y,width,height 입력창과 표시/삭제 버튼 추가
         rect_frame = ttk.Frame(screen_frame)
         rect_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -241,7 +1792,11 @@ class ScreenLayoutCapture:
         screen_canvas = tk.Canvas(screen_canvas_frame, bg='white', width=400, height=600)
         screen_v_scrollbar = ttk.Scrollbar(screen_canvas_frame, orient=tk.VERTICAL, command=screen_canvas.yview)
         screen_h_scrollbar = ttk.Scrollbar(screen_canvas_frame, orient=tk.HORIZONTAL, command=screen_canvas.xview)
-        screen_canvas.configure(yscrollcommand=screen_v_scrollbar.set, xscrollcommand=screen_h_scrollbar.set)
+        # 스크롤/크기 변경 시 보이는 영역의 타일을 다시 그림
+        screen_canvas.configure(
+            yscrollcommand=lambda first, last: self.on_screen_canvas_view(device_id, screen_v_scrollbar, first, last),
+            xscrollcommand=lambda first, last: self.on_screen_canvas_view(device_id, screen_h_scrollbar, first, last))
+        screen_canvas.bind('<Configure>', lambda e: self.schedule_tile_render(device_id))
 
         screen_canvas.grid(row=0, column=0, sticky="nsew")
         screen_v_scrollbar.grid(row=0, column=1, sticky="ns")
@@ -266,6 +1821,10 @@ class ScreenLayoutCapture:
         font_label = ttk.Label(layout_control_frame, text=f"Font : 10")
         font_label.pack(side=tk.LEFT)
 
+        # 레이아웃 덤프 소요 시간 표시
+        dump_time_label = ttk.Label(layout_control_frame, text="Dump : -")
+        dump_time_label.pack(side=tk.LEFT, padx=(10, 0))
+
         # 검색 프레임
         search_frame = ttk.Frame(layout_control_frame)
         search_frame.pack(side=tk.RIGHT)
@@ -276,6 +1835,10 @@ class ScreenLayoutCapture:
         ttk.Button(search_frame, text="검색",
                    command=lambda: self.search_text_in_layout(device_id)).pack(side=tk.LEFT, padx=(5, 0))
 
+        # 검색 결과 건수 / 현재 위치 표시
+        search_status_label = ttk.Label(search_frame, text="", width=16)
+        search_status_label.pack(side=tk.LEFT, padx=(5, 0))
+
         # 레이아웃 텍스트와 검색 컴포넌트를 분리하는 PanedWindow 추가 (세로 방향)
         layout_paned_window = ttk.PanedWindow(layout_frame, orient=tk.VERTICAL)
         layout_paned_window.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -383,6 +1946,16 @@ class ScreenLayoutCapture:
         all_things_entry = ttk.Entry(all_things_frame, width=30)
         all_things_entry.pack(side=tk.LEFT, padx=(10, 0), fill=tk.X, expand=True)
 
+        # 세 번째 라디오 버튼과 selector 쿼리 입력 필드
+        selector_frame = ttk.Frame(left_search_frame)
+        selector_frame.pack(fill=tk.X, pady=(5, 0))
+
+        selector_radio = ttk.Radiobutton(selector_frame, text="selector :", variable=search_type_var, value="selector")
+        selector_radio.pack(side=tk.LEFT)
+
+        selector_entry = ttk.Entry(selector_frame, width=30)
+        selector_entry.pack(side=tk.LEFT, padx=(10, 0), fill=tk.X, expand=True)
+
         # 오른쪽 프레임 (검색 버튼)
         right_search_frame = ttk.Frame(search_content_frame)
         right_search_frame.pack(side=tk.RIGHT, padx=(10, 0))
@@ -394,7 +1967,8 @@ class ScreenLayoutCapture:
         # 검색 결과 표시 영역
         result_text = tk.Text(search_items_tab, height=20, wrap=tk.WORD, font=("Arial", 10))
         result_scrollbar = ttk.Scrollbar(search_items_tab, orient=tk.VERTICAL, command=result_text.yview)
-        result_text.configure(yscrollcommand=result_scrollbar.set)
+        result_text.configure(yscrollcommand=lambda first, last: self.on_result_text_scroll(
+            device_id, result_scrollbar, first, last))
 
         result_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(5, 0), pady=(0, 5))
         result_scrollbar.pack(side=tk.RIGHT, fill=tk.Y, pady=(0, 5))
@@ -458,25 +2032,58 @@ class ScreenLayoutCapture:
             'screen_canvas': screen_canvas,
             'layout_text': layout_text,
             'current_device_label': current_device_label,
+            'online': True,
+            'reload_button': reload_button,
+            'reload_progress': reload_progress,
+            'layout_model': None,  # 레이아웃 캡처 시 만든 LayoutModel
+            'search_results': None,  # 마지막 검색 결과 (결과 창에 페이지 단위로 표시)
+            'layout_search_job': None,  # 진행 중인 Search Items 검색 (start_search_job)
+            'text_find_job': None,  # 진행 중인 레이아웃 텍스트 검색
+            'reload_token': None,  # 진행 중인 reload 식별용 (None이면 유휴 상태)
+            'reload_futures': (),
             'font_label': font_label,
+            'dump_time_label': dump_time_label,
             'search_entry': search_entry,
-            'screen_image': None,
+            'screen_image': None,  # 현재 표시 중인 축소 이미지 (PIL, 타일의 원본)
             'original_image': None,
-            'canvas_image': None,
+            'capture_seq': 0,  # original_image가 바뀔 때마다 증가 (축소 이미지 캐시 키)
+            # (capture_seq, scale) 또는 wireframe 합성본 (capture_seq, scale, layout_seq, 색상 구분)
+            #   -> (고품질 축소 이미지, 추정 byte 수), LRU 순서
+            'scaled_cache': OrderedDict(),
+            'scaled_cache_bytes': 0,
+            'scaled_pending': set(),  # 고품질 축소가 진행 중인 키
+            'canvas_image': None,  # 이미지 영역 item (실제 그림은 screen_tiles)
+            'screen_tiles': {},  # (tx, ty) -> (PhotoImage, canvas item)
+            'tile_render_pending': False,
             'selection_start': None,
             'selection_end': None,
             'selection_rect': None,
             'bounds_highlight_rect': None,
             'font_size': 10,
-            'undo_stack': [],
-            'redo_stack': [],
+            'undo_journal': UndoJournal(budget_bytes=undo_budget_bytes),
+            'regex_search': RegexSearchProcess(),  # 정규식 검색용 process (처음 검색할 때 시작)
             'search_positions': [],
             'current_search_index': -1,
+            'search_status_label': search_status_label,
+            'search_after_id': None,  # 입력 중 검색 예약 (debounce)
+            'last_search_term': None,
             'paned_window': paned_window,
             'coords_label': coords_label,
             'layout_v_scrollbar': layout_v_scrollbar,
             'line_numbers': line_numbers,
+            'line_number_items': [],  # 재사용하는 줄번호 text item
+            'line_number_state': None,  # 마지막으로 그린 (폭, 폰트)
+            'line_numbers_pending': False,
             'scale_var': scale_var,  # 축소 비율 변수 추가
+            'wireframe_var': wireframe_var,
+            'wireframe_color_var': wireframe_color_var,
+            'hover_var': hover_var,
+            'hover_status_label': hover_status_label,
+            'hover_point': None,  # 마지막 마우스 위치 (캔버스 좌표)
+            'hover_pending': False,
+            'hover_node': None,
+            'hover_rect': None,
+            'layout_seq': 0,  # layout_model이 바뀔 때마다 증가 (wireframe 캐시 키)
             'current_scale': 25,  # 기본 축소 비율 25%
             # 새로운 검색 컴포넌트들
             'search_type_var': search_type_var,
@@ -487,6 +2094,7 @@ class ScreenLayoutCapture:
             'package_entry': package_entry,
             'class_entry': class_entry,
             'all_things_entry': all_things_entry,
+            'selector_entry': selector_entry,
             'result_text': result_text,
             'layout_paned_window': layout_paned_window,  # splitbar 추가
             # GPT 관련 컴포넌트들
@@ -515,6 +2123,10 @@ class ScreenLayoutCapture:
         # 왼쪽 버튼 클릭: 좌표 표시 + 최소 면적 bounds 선택 (요청사항 2)
         screen_canvas.bind('<Button-1>', lambda e: self.on_canvas_left_click(e, device_id))
 
+        # hover inspect 모드
+        screen_canvas.bind('<Motion>', lambda e: self.on_canvas_motion(e, device_id))
+        screen_canvas.bind('<Leave>', lambda e: self.clear_hover(device_id))
+
         # Screen capture 마우스 휠 이벤트 바인딩
         screen_canvas.bind('<MouseWheel>', lambda e: self.on_screen_scroll(e, device_id))
         screen_canvas.bind('<Button-4>', lambda e: self.on_screen_scroll(e, device_id))  # Linux
@@ -533,6 +2145,7 @@ class ScreenLayoutCapture:
         layout_text.bind('<F3>', lambda e: self.search_previous(e, device_id))
         layout_text.bind('<F4>', lambda e: self.search_next(e, device_id))
         search_entry.bind('<Return>', lambda e: self.search_text_in_layout(device_id))
+        search_entry.bind('<KeyRelease>', lambda e: self.on_search_entry_change(e, device_id))
 
         # 우클릭 메뉴 생성
         if not hasattr(self, 'context_menu'):
@@ -545,7 +2158,8 @@ class ScreenLayoutCapture:
 
         # 탭을 활성화하고 초기 캡처 실행
         self.notebook.select(capture_tab)
-        self.reload_capture(device_id)
+        if reload:
+            self.reload_capture(device_id)
 
         return capture_tab
 
@@ -563,8 +2177,10 @@ class ScreenLayoutCapture:
             width = int(tab_info['width_entry'].get())
             height = int(tab_info['height_entry'].get())
 
-            width = width if is_stp_mode else width - x
-            height = height if is_stp_mode else height - y
+            # 현재 덤프의 bounds 형식에 맞춰 입력값 해석 ('{x, y, w, h}'이면 그대로, 아니면 우하단 좌표)
+            if self.get_bounds_format(device_id) != 'xywh':
+                width = width - x
+                height = height - y
 
 
             # 축소 비율 적용
@@ -771,15 +2387,15 @@ class ScreenLayoutCapture:
         tab_info = self.device_tabs[device_id]
         search_type = tab_info['search_type_var'].get()
 
-        # 레이아웃 텍스트 내용 가져오기
-        layout_content = tab_info['layout_text'].get(1.0, tk.END)
+        # 캡처 시 만든 레이아웃 모델 (편집되었으면 다시 생성)
+        layout_model = self.get_layout_model(device_id)
 
-        # 이전 검색 하이라이트 제거
+        # 이전 검색 중단 및 하이라이트 제거
+        self.cancel_search_job(device_id, 'layout_search_job')
+        tab_info['search_results'] = None
         tab_info['layout_text'].tag_remove("search_highlight", 1.0, tk.END)
         tab_info['result_text'].delete(1.0, tk.END)
 
-        matching_lines = []
-
         if search_type == "specific":
             # 특정 필드 검색
             text_val = tab_info['text_entry'].get().strip()
@@ -795,11 +2411,20 @@ class ScreenLayoutCapture:
                 messagebox.showwarning("경고", "검색할 값을 하나 이상 입력해주세요.")
                 return
 
-            lines = layout_content.split('\n')
-            for line_num, line in enumerate(lines, 1):
-                if self.matches_specific_search(line, text_val, resource_id_val, content_desc_val,
-                                                hint_val, package_val, class_val):
-                    matching_lines.append((line_num, line.strip()))
+            # 캡처 시 만든 속성 인덱스의 교집합으로 검색
+            criteria = {
+                'text': text_val,
+                'resource-id': resource_id_val,
+                layout_model.content_desc_attribute: content_desc_val,
+                'hint': hint_val,
+                'package': package_val,
+                'class': class_val,
+            }
+            criteria = {attr: value for attr, value in criteria.items() if value}
+
+            def iter_results():
+                for node in layout_model.find_by_attributes(criteria):
+                    yield node, None
 
         elif search_type == "all":
             # 전체 속성 검색 (Regular expression으로 변경)
@@ -808,110 +2433,230 @@ class ScreenLayoutCapture:
                 messagebox.showwarning("경고", "검색할 값을 입력해주세요.")
                 return
 
-            lines = layout_content.split('\n')
-            for line_num, line in enumerate(lines, 1):
-                if self.matches_all_things_search_regex(line, all_things_val):
-                    matching_lines.append((line_num, line.strip()))
-
-        # 결과 표시
-        if matching_lines:
-            # 레이아웃 텍스트에서 해당 라인들 하이라이트
-            for line_num, line_content in matching_lines:
-                line_start = f"{line_num}.0"
-                line_end = f"{line_num}.end"
-                tab_info['layout_text'].tag_add("search_highlight", line_start, line_end)
-
-            # 검색 하이라이트 스타일 설정
-            tab_info['layout_text'].tag_configure("search_highlight", background="yellow")
-
-            # 첫 번째 결과로 스크롤
-            first_line = matching_lines[0][0]
-            tab_info['layout_text'].see(f"{first_line}.0")
-
-            # 결과 텍스트에 표시 (요청사항 반영: x,y,width,height 값과 전체 raw 문자열 표시)
-            result_text = f""
-            for line_num, line_content in matching_lines:
-                # bounds 정보 추출
-                # for stp_mode
-                if is_stp_mode:
-                    bounds_match = re.search(r'bounds="\{(\d+), (\d+), (\d+), (\d+)\}"', line_content)
-                else:
-                    bounds_match = re.search(r'bounds="\[(\d+),(\d+)\]\[(\d+),(\d+)\]"', line_content)
+            # 속성 값 열에 대해 한 번 컴파일한 정규식으로 검색 (결과 상세: 매칭된 속성 이름, span)
+            # 정규식 문법이 들어간 검색어는 중간에 멈출 수 있도록 별도 process에서 검색
+            if REGEX_SPECIAL_CHARS.intersection(all_things_val):
+                def iter_results():
+                    return tab_info['regex_search'].iter_results(layout_model, 'all', all_things_val)
+            else:
+                def iter_results():
+                    for node, attr, span in layout_model.iter_search_columns(all_things_val):
+                        yield node, (attr, span)
+
+        elif search_type == "selector":
+            # selector 쿼리 (속성/공간 인덱스로 후보를 좁혀서 평가)
+            selector_val = tab_info['selector_entry'].get().strip()
+            if not selector_val:
+                messagebox.showwarning("경고", "selector를 입력해주세요.")
+                return
 
-                if bounds_match:
-                    x1, y1, x2, y2 = bounds_match.groups()
-                    width = int(x2) if is_stp_mode else int(x2) - int(x1)
-                    height = int(y2) if is_stp_mode else int(y2) - int(y1)
-                    result_text += f"x={x1},y={y1},w={width},h={height}: Line {line_num}: {line_content}\n"
-                else:
-                    result_text += f"Line {line_num}: {line_content}\n"
+            try:
+                selector = LayoutSelector(selector_val)
+            except SelectorError as e:
+                messagebox.showwarning("경고", f"잘못된 selector입니다: {e}")
+                return
 
-            tab_info['result_text'].insert(1.0, result_text)
+            # [attr~=/regex/] 조건이 있으면 별도 process에서 평가
+            if any(op == '~=' for step in selector.steps for _, op, _ in step.attr_conditions):
+                def iter_results():
+                    return tab_info['regex_search'].iter_results(layout_model, 'selector', selector_val)
+            else:
+                def iter_results():
+                    for node in selector.iter_matches(layout_model):
+                        yield node, None
 
         else:
-            tab_info['result_text'].insert(1.0, "")
-
-    def matches_specific_search(self, line, text_val, resource_id_val, content_desc_val,
-                                hint_val, package_val, class_val):
-        """특정 필드 검색 매칭 로직"""
-        # 값이 있는 필드들만 체크
-        checks = []
-
-        if text_val:
-            checks.append(f'text="{text_val}"' in line)
-        if resource_id_val:
-            checks.append(f'resource-id="{resource_id_val}"' in line)
-        if content_desc_val:
-            checks.append(f'{var_content_desc}="{content_desc_val}"' in line)
-        if hint_val:
-            checks.append(f'hint="{hint_val}"' in line)
-        if package_val:
-            checks.append(f'package="{package_val}"' in line)
-        if class_val:
-            checks.append(f'class="{class_val}"' in line)
-
-        # 모든 조건이 만족되어야 함
-        return len(checks) > 0 and all(checks)
-
-    def matches_all_things_search_regex(self, line, search_val):
-        """전체 속성 검색 매칭 로직 (Regular expression 방식으로 변경)"""
-        try:
-            # 정규표현식 패턴 컴파일
-            pattern = re.compile(search_val, re.IGNORECASE)
-
-            # 모든 속성에서 검색 (정규표현식으로 매칭)
-            for attr in g_attributes:
-                attr_start = line.find(attr)
-                if attr_start != -1:
-                    # 속성 값 추출 (따옴표 사이의 값)
-                    quote_start = line.find('"', attr_start)
-                    if quote_start != -1:
-                        quote_end = line.find('"', quote_start + 1)
-                        if quote_end != -1:
-                            attr_value = line[quote_start + 1:quote_end]
-                            # 정규표현식으로 매칭 검사
-                            if pattern.search(attr_value):
-                                return True
-            return False
-        except re.error:
-            # 잘못된 정규표현식인 경우 일반 문자열 검색으로 fallback
-            return self.matches_all_things_search(line, search_val)
+            return
 
-    def matches_all_things_search(self, line, search_val):
-        """전체 속성 검색 매칭 로직 (기존 문자열 일치 방식)"""
-        # 모든 속성에서 검색 값이 포함되어 있는지 확인
-        for attr in g_attributes:
-            attr_start = line.find(attr)
-            if attr_start != -1:
-                # 속성 값 추출 (따옴표 사이의 값)
-                quote_start = line.find('"', attr_start)
-                if quote_start != -1:
-                    quote_end = line.find('"', quote_start + 1)
-                    if quote_end != -1:
-                        attr_value = line[quote_start + 1:quote_end]
-                        if search_val in attr_value:
-                            return True
-        return False
+        # 결과 표시 (찾는 대로 건수와 하이라이트를 갱신하고, 상세 줄은 스크롤에 따라 페이지 단위로 추가)
+        results = {
+            'model': layout_model,
+            'nodes': [],
+            'details': {},  # node_id -> (매칭된 속성 이름, span) - 'all things' 검색에서만 사용
+            'rendered': 0,
+            'pending': False,
+        }
+        tab_info['search_results'] = results
+        tab_info['result_text'].insert(1.0, "검색 중...\n")
+
+        # 검색 하이라이트 스타일 설정
+        tab_info['layout_text'].tag_configure("search_highlight", background="yellow")
+
+        # 모델은 만든 뒤 바뀌지 않으므로 worker thread에서 그대로 조회
+        self.start_search_job(device_id, 'layout_search_job', iter_results(),
+                              lambda batch: self.on_layout_search_batch(device_id, results, batch),
+                              lambda error: self.on_layout_search_done(device_id, results, error),
+                              on_cancel=tab_info['regex_search'].cancel)
+
+    def on_layout_search_batch(self, device_id, results, batch):
+        """Search Items 검색 결과 일부를 받아서 하이라이트와 결과 창 갱신"""
+        tab_info = self.device_tabs[device_id]
+        first_batch = not results['nodes']
+
+        for node, detail in batch:
+            results['nodes'].append(node)
+            if detail is not None:
+                results['details'][node.node_id] = detail
+
+        # 레이아웃 텍스트에서 해당 라인들 하이라이트
+        self.add_tag_ranges(tab_info['layout_text'], "search_highlight",
+                            [(f"{node.line_num}.0", f"{node.line_num}.end") for node, _ in batch])
+
+        # 첫 번째 결과로 스크롤
+        if first_batch:
+            tab_info['layout_text'].see(f"{results['nodes'][0].line_num}.0")
+
+        self.set_search_result_header(device_id, f"검색 중... {len(results['nodes'])}건")
+        self.schedule_search_results_page(device_id, tab_info['result_text'].yview()[1])
+
+    def on_layout_search_done(self, device_id, results, error):
+        """Search Items 검색 완료 시 전체 건수 표시"""
+        if error is not None:
+            self.set_search_result_header(device_id, f"검색 실패: {error}")
+        else:
+            self.set_search_result_header(device_id, f"검색 결과: {len(results['nodes'])}건")
+
+    def set_search_result_header(self, device_id, text):
+        """결과 창 첫 줄(건수 표시) 변경"""
+        result_text = self.device_tabs[device_id]['result_text']
+        result_text.delete("1.0", "1.end")
+        result_text.insert("1.0", text)
+
+    def start_search_job(self, device_id, job_key, results_iter, on_batch, on_done, on_cancel=None):
+        """
+        results_iter를 worker thread에서 실행하고, 결과를 묶어서 queue로 보내 root.after로 UI에 전달.
+        같은 job_key의 이전 검색은 취소한다. 취소는 결과 하나 단위로 확인하며,
+        on_cancel이 있으면 취소할 때 함께 호출한다 (정규식 검색 process 종료).
+        """
+        self.cancel_search_job(device_id, job_key)
+
+        job = {'cancel': threading.Event(), 'queue': queue.Queue(), 'on_cancel': on_cancel}
+        self.device_tabs[device_id][job_key] = job
+
+        def worker():
+            batch = []
+            last_flush = time.monotonic()
+            try:
+                for result in results_iter:
+                    if job['cancel'].is_set():
+                        return
+                    batch.append(result)
+                    if len(batch) >= SEARCH_BATCH_SIZE or time.monotonic() - last_flush >= SEARCH_POLL_MS / 1000:
+                        job['queue'].put(('batch', batch))
+                        batch = []
+                        last_flush = time.monotonic()
+                if batch:
+                    job['queue'].put(('batch', batch))
+                job['queue'].put(('done', None))
+            except Exception as e:
+                job['queue'].put(('error', e))
+
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(SEARCH_POLL_MS, lambda: self.drain_search_job(device_id, job_key, job, on_batch, on_done))
+
+    def drain_search_job(self, device_id, job_key, job, on_batch, on_done):
+        """worker 결과 queue를 정해진 시간만큼 비우고, 끝나지 않았으면 다시 예약"""
+        if device_id not in self.device_tabs or self.device_tabs[device_id][job_key] is not job:
+            return  # 탭이 닫혔거나 새 검색으로 취소됨
+
+        deadline = time.monotonic() + SEARCH_DRAIN_BUDGET
+        while time.monotonic() < deadline:
+            try:
+                kind, payload = job['queue'].get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == 'batch':
+                on_batch(payload)
+            else:
+                self.device_tabs[device_id][job_key] = None
+                on_done(payload if kind == 'error' else None)
+                return
+
+        self.root.after(SEARCH_POLL_MS, lambda: self.drain_search_job(device_id, job_key, job, on_batch, on_done))
+
+    def cancel_search_job(self, device_id, job_key):
+        """진행 중인 백그라운드 검색 취소"""
+        tab_info = self.device_tabs.get(device_id)
+        if tab_info and tab_info[job_key]:
+            tab_info[job_key]['cancel'].set()
+            if tab_info[job_key]['on_cancel']:
+                tab_info[job_key]['on_cancel']()
+            tab_info[job_key] = None
+
+    def add_tag_ranges(self, text_widget, tag, ranges):
+        """여러 (시작, 끝) 범위에 tag를 적용 (범위마다 호출하지 않고 묶어서 tag_add 호출)"""
+        for start in range(0, len(ranges), TAG_RANGE_BATCH_SIZE):
+            indices = [index for index_range in ranges[start:start + TAG_RANGE_BATCH_SIZE] for index in index_range]
+            text_widget.tag_add(tag, *indices)
+
+    def format_search_result(self, layout_model, node, match_details):
+        """검색 결과 한 줄 (요청사항 반영: x,y,width,height 값과 전체 raw 문자열 표시)"""
+        line_content = layout_model.lines[node.line_num - 1].strip()
+        line_label = f"Line {node.line_num}"
+        if node.node_id in match_details:
+            attr, (start, end) = match_details[node.node_id]
+            line_label += f" ({attr}[{start}:{end}])"
+
+        if node.bounds:
+            bounds = node.bounds
+            return (f"x={bounds.x1},y={bounds.y1},w={bounds.width},h={bounds.height}: "
+                    f"{line_label}: {line_content}\n")
+        return f"{line_label}: {line_content}\n"
+
+    def render_search_results_page(self, device_id):
+        """아직 표시하지 않은 검색 결과를 한 페이지만큼 결과 창 끝에 추가"""
+        if device_id not in self.device_tabs:
+            return
+
+        tab_info = self.device_tabs[device_id]
+        results = tab_info['search_results']
+        if results is None:
+            return
+
+        results['pending'] = False
+        start = results['rendered']
+        page = results['nodes'][start:start + SEARCH_RESULT_PAGE_SIZE]
+        if not page:
+            return
+
+        results['rendered'] = start + len(page)
+        tab_info['result_text'].insert(tk.END, "".join(
+            self.format_search_result(results['model'], node, results['details']) for node in page))
+
+    def on_result_text_scroll(self, device_id, scrollbar, first, last):
+        """결과 창 스크롤 시 끝에 가까워지면 다음 페이지를 idle 시점에 추가"""
+        scrollbar.set(first, last)
+        self.schedule_search_results_page(device_id, last)
+
+    def schedule_search_results_page(self, device_id, last):
+        """결과 창의 보이는 끝 위치(last)가 끝에 가깝고 남은 결과가 있으면 다음 페이지 추가 예약"""
+        if device_id not in self.device_tabs:
+            return
+
+        results = self.device_tabs[device_id]['search_results']
+        if (results is not None and not results['pending'] and results['rendered'] < len(results['nodes'])
+                and float(last) >= SEARCH_RESULT_PREFETCH):
+            results['pending'] = True
+            self.root.after_idle(lambda: self.render_search_results_page(device_id))
+
+    def get_bounds_format(self, device_id):
+        """탭의 레이아웃 덤프에서 감지된 bounds 형식 (아직 없으면 stp_mode 기준 기본값)"""
+        layout_model = self.device_tabs[device_id]['layout_model']
+        if layout_model is not None and layout_model.bounds_codec.format:
+            return layout_model.bounds_codec.format
+        return 'xywh' if is_stp_mode else 'corners'
+
+    def get_layout_model(self, device_id):
+        """탭의 레이아웃 모델 반환 (layout_text가 편집되었으면 현재 텍스트로 다시 생성)"""
+        tab_info = self.device_tabs[device_id]
+        layout_text = tab_info['layout_text']
+
+        if tab_info['layout_model'] is None or layout_text.edit_modified():
+            tab_info['layout_model'] = LayoutModel.from_text(layout_text.get(1.0, tk.END))
+            tab_info['layout_seq'] += 1
+            layout_text.edit_modified(False)
+        return tab_info['layout_model']
 
     def is_click_on_image(self, event, device_id):
         """마우스 클릭이 이미지 영역 내에 있는지 확인"""
@@ -964,45 +2709,67 @@ class ScreenLayoutCapture:
         self.update_line_numbers(device_id)
 
     def update_line_numbers(self, device_id):
-        """레이아웃 텍스트의 줄번호 표시 갱신"""
+        """레이아웃 텍스트의 줄번호 갱신 예약 (스크롤/입력이 몰려도 idle 시점에 한 번만 그림)"""
+        if device_id not in self.device_tabs:
+            return
+
+        tab_info = self.device_tabs[device_id]
+        if not tab_info['line_numbers_pending']:
+            tab_info['line_numbers_pending'] = True
+            self.root.after_idle(lambda: self.draw_line_numbers(device_id))
+
+    def get_font_metrics(self, font_spec):
+        """폰트의 (줄 높이, 숫자 한 글자 폭) - 폰트 크기가 바뀔 때만 새로 측정"""
+        key = str(font_spec)
+        if key not in self.font_metrics_cache:
+            font = tkfont.Font(font=font_spec)
+            self.font_metrics_cache[key] = (font.metrics('linespace'), font.measure('9'))
+        return self.font_metrics_cache[key]
+
+    def draw_line_numbers(self, device_id):
+        """레이아웃 텍스트의 줄번호 표시 갱신 (기존 text item의 글자와 위치만 변경)"""
         if device_id not in self.device_tabs:
             return
         tab_info = self.device_tabs[device_id]
+        tab_info['line_numbers_pending'] = False
         layout_text = tab_info['layout_text']
         line_numbers = tab_info['line_numbers']
 
         # 전체 라인 수
         total_lines = int(layout_text.index('end-1c').split('.')[0])
         # 폰트 정보
-        font = tkfont.Font(font=layout_text['font'])
+        font_spec = layout_text['font']
+        linespace, digit_width = self.get_font_metrics(font_spec)
         digits = max(2, len(str(total_lines)))
-        width_px = font.measure('9' * digits) + 8
-        line_numbers.config(width=width_px)
+        width_px = digit_width * digits + 8
 
-        # 현재 보이는 첫/마지막 라인
+        # 현재 보이는 첫 라인과 줄 높이 (wrap=NONE이므로 모든 줄의 높이가 같음)
         first_visible_line = int(layout_text.index("@0,0").split('.')[0])
-        last_visible_line = int(layout_text.index(f"@0,{layout_text.winfo_height()}").split('.')[0])
-
-        # 기준 y 오프셋
         first_info = layout_text.dlineinfo(f"{first_visible_line}.0")
-        base_y = first_info[1] if first_info else 0
-
-        # 캔버스 클리어
-        line_numbers.delete("all")
-
-        # 줄번호 그리기
-        for line in range(first_visible_line, last_visible_line + 1):
-            info = layout_text.dlineinfo(f"{line}.0")
-            if info:
-                y = info[1] - base_y
-                number = str(line)
-                line_numbers.create_text(
-                    width_px - 4, y,
-                    anchor="ne",
-                    text=number,
-                    font=layout_text['font'],
-                    fill="#555555"
-                )
+        line_height = first_info[3] if first_info else linespace
+        visible_count = 0
+        if first_info:
+            visible_count = min(total_lines - first_visible_line + 1,
+                                layout_text.winfo_height() // max(line_height, 1) + 1)
+
+        # 폭/폰트가 바뀌었으면 캔버스와 기존 item에 반영
+        items = tab_info['line_number_items']
+        if tab_info['line_number_state'] != (width_px, font_spec):
+            line_numbers.config(width=width_px)
+            tab_info['line_number_state'] = (width_px, font_spec)
+            for number_item in items:
+                line_numbers.itemconfigure(number_item, font=font_spec)
+
+        # 필요한 만큼 item 추가 / 남는 item 제거
+        while len(items) < visible_count:
+            items.append(line_numbers.create_text(0, 0, anchor="ne", font=font_spec, fill="#555555"))
+        while len(items) > visible_count:
+            line_numbers.delete(items.pop())
+
+        # 줄번호 그리기 (첫 줄 기준으로 줄 높이만큼 아래로)
+        for index, number_item in enumerate(items):
+            line_numbers.coords(number_item, width_px - 4, index * line_height)
+            line_numbers.itemconfigure(number_item, text=str(first_visible_line + index))
 
     def on_canvas_right_click(self, event, device_id):
         """캔버스 오른쪽 클릭 시작 (영역 선택용)"""
@@ -1063,9 +2830,8 @@ class ScreenLayoutCapture:
             resolution = f"{tab_info['original_image'].width}x{tab_info['original_image'].height}"
             tab_info['coords_label'].configure(text=f"이미지 Resolution : {resolution}, 좌표 : ({actual_x},{actual_y})")
 
-        # Layout XML에서 해당 좌표를 포함하는 bounds 중 최소 면적 라인 찾기
-        layout_content = tab_info['layout_text'].get(1.0, tk.END)
-        result = self.find_smallest_bounds_line(layout_content, actual_x, actual_y)
+        # Layout 모델에서 해당 좌표를 포함하는 bounds 중 최소 면적 라인 찾기
+        result = self.find_smallest_bounds_line(self.get_layout_model(device_id), actual_x, actual_y)
 
         if result:
             line_num, bounds = result
@@ -1079,43 +2845,14 @@ class ScreenLayoutCapture:
                 scaled_y2 = int(y2 * scale_ratio)
                 self.highlight_bounds_on_screen(device_id, scaled_x1, scaled_y1, scaled_x2, scaled_y2)
 
-    def find_smallest_bounds_line(self, xml_content, x, y):
+    def find_smallest_bounds_line(self, layout_model, x, y):
         """
-        XML 내용에서 주어진 좌표를 포함하는 bounds를 가진 라인들 중
-        width*height 면적이 가장 작은 라인의 번호와 bounds를 반환.
+        레이아웃 모델에서 주어진 좌표를 포함하는 bounds를 가진 node들 중
+        width*height 면적이 가장 작은 node의 라인 번호와 bounds를 반환.
         """
-        lines = xml_content.split('\n')
-        smallest_area = None
-        best_line_num = None
-        best_bounds = None
-
-        # bounds="[\d+, \d+, \d+, \d+" 패턴
-        # for stp_mode
-        if is_stp_mode:
-            pattern = re.compile(r'bounds="\{(\d+), (\d+), (\d+), (\d+)\}"')
-        else:
-            pattern = re.compile(r'bounds="\[(\d+),(\d+)\]\[(\d+),(\d+)\]"')
-
-
-        for line_num, line in enumerate(lines, start=1):
-            m = pattern.search(line)
-            if not m:
-                continue
-            x1, y1, x2, y2 = map(int, m.groups())
-
-            # for stp_mode
-            x2 = x1 + x2 if is_stp_mode else x2
-            y2 = y1 + y2 if is_stp_mode else y2
-
-            if x1 <= x <= x2 and y1 <= y <= y2:
-                area = max(0, x2 - x1) * max(0, y2 - y1)
-                if smallest_area is None or area < smallest_area:
-                    smallest_area = area
-                    best_line_num = line_num
-                    best_bounds = (x1, y1, x2, y2)
-
-        if best_line_num is not None:
-            return best_line_num, best_bounds
+        node = layout_model.find_smallest_at(x, y)
+        if node is not None:
+            return node.line_num, node.bounds
         return None
 
     def select_line_in_layout(self, device_id, line_number):
@@ -1148,24 +2885,11 @@ class ScreenLayoutCapture:
         line_index = layout_text.index(f"@{event.x},{event.y}")
         line_num = int(line_index.split('.')[0])
 
-        # 해당 라인의 내용 가져오기
-        line_start = f"{line_num}.0"
-        line_end = f"{line_num}.end"
-        line_content = layout_text.get(line_start, line_end)
+        # 해당 라인의 node bounds 찾기
+        node = self.get_layout_model(device_id).node_at_line(line_num)
 
-        # bounds 속성 찾기
-        # for stp_mode
-        if is_stp_mode:
-            m = re.search(r'bounds="\{(\d+), (\d+), (\d+), (\d+)\}"', line_content)
-        else:
-            m = re.search(r'bounds="\[(\d+),(\d+)\]\[(\d+),(\d+)\]"', line_content)
-
-        if m:
-            x1, y1, x2, y2 = map(int, m.groups())
-
-            # for stp_mode
-            x2 = x1 + x2 if is_stp_mode else x2
-            y2 = y1 + y2 if is_stp_mode else y2
+        if node is not None and node.bounds:
+            x1, y1, x2, y2 = node.bounds
 
             # 축소 비율 적용
             scale_ratio = tab_info['current_scale'] / 100.0
@@ -1194,6 +2918,81 @@ class ScreenLayoutCapture:
             outline='blue', dash=(5, 5), width=2
         )
 
+    def on_canvas_motion(self, event, device_id):
+        """hover 모드에서 마우스 이동 시 마지막 위치만 기억하고 HOVER_THROTTLE_MS마다 한 번 처리"""
+        if device_id not in self.device_tabs:
+            return
+
+        tab_info = self.device_tabs[device_id]
+        if not tab_info['hover_var'].get() or not tab_info['original_image']:
+            return
+
+        screen_canvas = tab_info['screen_canvas']
+        tab_info['hover_point'] = (screen_canvas.canvasx(event.x), screen_canvas.canvasy(event.y))
+        if not tab_info['hover_pending']:
+            tab_info['hover_pending'] = True
+            self.root.after(HOVER_THROTTLE_MS, lambda: self.update_hover(device_id))
+
+    def update_hover(self, device_id):
+        """마우스 아래의 최소 면적 node를 공간 인덱스로 찾아 표시 (node가 그대로면 아무것도 하지 않음)"""
+        if device_id not in self.device_tabs:
+            return
+
+        tab_info = self.device_tabs[device_id]
+        tab_info['hover_pending'] = False
+        if not tab_info['hover_var'].get() or tab_info['hover_point'] is None:
+            return
+
+        scale_ratio = tab_info['current_scale'] / 100.0
+        canvas_x, canvas_y = tab_info['hover_point']
+        layout_model = self.get_layout_model(device_id)
+        node = layout_model.find_smallest_at(int(canvas_x / scale_ratio), int(canvas_y / scale_ratio))
+        if node is tab_info['hover_node']:
+            return
+        tab_info['hover_node'] = node
+
+        screen_canvas = tab_info['screen_canvas']
+        if node is None:
+            if tab_info['hover_rect']:
+                screen_canvas.itemconfigure(tab_info['hover_rect'], state='hidden')
+            tab_info['hover_status_label'].configure(text="")
+            return
+
+        # 하이라이트 사각형은 하나를 만들어 두고 위치만 변경
+        bounds = node.bounds
+        coords = (int(bounds.x1 * scale_ratio), int(bounds.y1 * scale_ratio),
+                  int(bounds.x2 * scale_ratio), int(bounds.y2 * scale_ratio))
+        if tab_info['hover_rect']:
+            screen_canvas.coords(tab_info['hover_rect'], *coords)
+            screen_canvas.itemconfigure(tab_info['hover_rect'], state='normal')
+        else:
+            tab_info['hover_rect'] = screen_canvas.create_rectangle(*coords, outline='magenta', width=2)
+
+        attrib = node.attrib
+        details = [attrib.get('class', '').rsplit('.', 1)[-1] or 'node']
+        for attr in ('resource-id', 'text', layout_model.content_desc_attribute):
+            value = attrib.get(attr)
+            if value:
+                details.append(f"{attr}={value[:40]}")
+        states = [attr for attr in ('clickable', 'focusable', 'scrollable') if attrib.get(attr) == 'true']
+        if states:
+            details.append(','.join(states))
+        details.append(f"[{bounds.x1},{bounds.y1}][{bounds.x2},{bounds.y2}]")
+        tab_info['hover_status_label'].configure(text=f"Line {node.line_num}: " + " | ".join(details))
+
+    def clear_hover(self, device_id):
+        """hover 하이라이트와 상태 표시 제거"""
+        if device_id not in self.device_tabs:
+            return
+
+        tab_info = self.device_tabs[device_id]
+        tab_info['hover_point'] = None
+        tab_info['hover_node'] = None
+        if tab_info['hover_rect']:
+            tab_info['screen_canvas'].delete(tab_info['hover_rect'])
+            tab_info['hover_rect'] = None
+        tab_info['hover_status_label'].configure(text="")
+
     def on_screen_scroll(self, event, device_id):
         """Screen capture 영역에서 마우스 휠 스크롤 처리"""
         if device_id not in self.device_tabs:
@@ -1239,6 +3038,7 @@ class ScreenLayoutCapture:
             # 탭 삭제
             self.notebook.forget(tab)
             # 디바이스 정보 삭제
+            self.device_tabs[device_to_remove]['regex_search'].close()
             del self.device_tabs[device_to_remove]
 
     def on_font_size_change(self, event, device_id):
@@ -1286,13 +3086,8 @@ class ScreenLayoutCapture:
             return
 
         tab_info = self.device_tabs[device_id]
-        current_text = tab_info['layout_text'].get(1.0, tk.END)
-
-        if not tab_info['undo_stack'] or tab_info['undo_stack'][-1] != current_text:
-            tab_info['undo_stack'].append(current_text)
-            if len(tab_info['undo_stack']) > 100:
-                tab_info['undo_stack'].pop(0)
-            tab_info['redo_stack'].clear()
+        # Text가 항상 붙이는 마지막 줄바꿈은 제외 (변경 구간 offset이 항상 실제 내용 안에 있도록)
+        tab_info['undo_journal'].record(tab_info['layout_text'].get(1.0, 'end-1c'))
 
     def undo_text_change(self, event, device_id):
         """텍스트 변경 취소 (Ctrl+Z)"""
@@ -1301,15 +3096,13 @@ class ScreenLayoutCapture:
 
         tab_info = self.device_tabs[device_id]
 
-        if len(tab_info['undo_stack']) > 1:
-            current_text = tab_info['undo_stack'].pop()
-            tab_info['redo_stack'].append(current_text)
-            previous_text = tab_info['undo_stack'][-1]
+        # 아직 기록되지 않은 변경(마우스 붙여넣기 등)이 있으면 먼저 기록
+        self.save_text_state(device_id)
 
-            tab_info['layout_text'].delete(1.0, tk.END)
-            tab_info['layout_text'].insert(1.0, previous_text)
-            # 줄번호 갱신
-            self.update_line_numbers(device_id)
+        journal = tab_info['undo_journal']
+        change = journal.undo()
+        if change is not None:
+            self.apply_text_change(device_id, *change)
         return "break"
 
     def redo_text_change(self, event, device_id):
@@ -1319,56 +3112,127 @@ class ScreenLayoutCapture:
 
         tab_info = self.device_tabs[device_id]
 
-        if tab_info['redo_stack']:
-            next_text = tab_info['redo_stack'].pop()
-            tab_info['undo_stack'].append(next_text)
+        # 기록되지 않은 변경이 있으면 기록 (이 경우 redo 이력은 비워짐)
+        self.save_text_state(device_id)
 
-            tab_info['layout_text'].delete(1.0, tk.END)
-            tab_info['layout_text'].insert(1.0, next_text)
-            # 줄번호 갱신
-            self.update_line_numbers(device_id)
+        journal = tab_info['undo_journal']
+        change = journal.redo()
+        if change is not None:
+            self.apply_text_change(device_id, *change)
         return "break"
 
-    def search_text_in_layout(self, device_id, event=None):
-        """레이아웃 텍스트에서 검색"""
+    def apply_text_change(self, device_id, start, old, new):
+        """undo/redo 변경 구간만 layout_text에 적용 (보이는 위치와 나머지 부분의 tag 유지)"""
+        tab_info = self.device_tabs[device_id]
+        layout_text = tab_info['layout_text']
+
+        journal = tab_info['undo_journal']
+        line, col = journal.line_col(start)
+        start_index = f"{line}.{col}"
+        end_index = f"{start_index}+{tk_char_count(old)}c"
+        top_index = layout_text.index("@0,0")
+
+        if layout_text.get(start_index, end_index) != old:
+            # 위젯 내용이 이력과 어긋났으면 전체 텍스트를 이력 기준으로 교체
+            layout_text.delete(1.0, tk.END)
+            layout_text.insert(1.0, journal.text)
+            layout_text.yview(top_index)
+            self.update_line_numbers(device_id)
+            return
+
+        if old:
+            layout_text.delete(start_index, end_index)
+        if new:
+            layout_text.insert(start_index, new)
+
+        # 보던 위치를 유지하고, 변경 위치가 화면 밖일 때만 스크롤
+        layout_text.yview(top_index)
+        layout_text.mark_set(tk.INSERT, f"{start_index}+{tk_char_count(new)}c")
+        layout_text.see(start_index)
+
+        # 줄 수가 바뀐 경우에만 줄번호 갱신 (스크롤되면 yscrollcommand에서 갱신됨)
+        if '\n' in old or '\n' in new:
+            self.update_line_numbers(device_id)
+
+    def on_search_entry_change(self, event, device_id):
+        """검색어 입력 시 마지막 입력 후 SEARCH_DEBOUNCE_MS 뒤에 검색"""
         if device_id not in self.device_tabs:
             return
 
         tab_info = self.device_tabs[device_id]
-        search_term = tab_info['search_entry'].get().strip()
-        if not search_term:
+        if tab_info['search_after_id']:
+            self.root.after_cancel(tab_info['search_after_id'])
+        tab_info['search_after_id'] = self.root.after(
+            SEARCH_DEBOUNCE_MS, lambda: self.search_text_in_layout(device_id, incremental=True))
+
+    def search_text_in_layout(self, device_id, event=None, incremental=False):
+        """레이아웃 텍스트에서 검색 (캐시된 문서 문자열에서 찾고 Tk index로 한 번에 변환)"""
+        if device_id not in self.device_tabs:
             return
 
-        content = tab_info['layout_text'].get(1.0, tk.END)
+        tab_info = self.device_tabs[device_id]
+        if tab_info['search_after_id']:
+            self.root.after_cancel(tab_info['search_after_id'])
+            tab_info['search_after_id'] = None
+
+        search_term = tab_info['search_entry'].get().strip()
+        layout_text = tab_info['layout_text']
+
+        # 입력 중 검색은 검색어와 문서가 그대로면 다시 하지 않음
+        if incremental and search_term == tab_info['last_search_term'] and not layout_text.edit_modified():
+            return
+        tab_info['last_search_term'] = search_term
 
         # 검색 결과 초기화
+        self.cancel_search_job(device_id, 'text_find_job')
         tab_info['search_positions'] = []
         tab_info['current_search_index'] = -1
 
         # 이전 검색 하이라이트 제거
-        tab_info['layout_text'].tag_remove("search_highlight", 1.0, tk.END)
-
-        # 검색 실행
-        start = 1.0
-        while True:
-            pos = tab_info['layout_text'].search(search_term, start, tk.END)
-            if not pos:
-                break
+        layout_text.tag_remove("search_highlight", 1.0, tk.END)
+        layout_text.tag_remove("current_search", 1.0, tk.END)
 
-            end_pos = f"{pos}+{len(search_term)}c"
-            tab_info['search_positions'].append((pos, end_pos))
-            tab_info['layout_text'].tag_add("search_highlight", pos, end_pos)
-            start = end_pos
+        if not search_term:
+            tab_info['search_status_label'].config(text="")
+            return
 
         # 검색 하이라이트 스타일 설정
-        tab_info['layout_text'].tag_configure("search_highlight", background="yellow")
+        layout_text.tag_configure("search_highlight", background="yellow")
 
-        if tab_info['search_positions']:
+        # 검색 실행 (편집되었으면 모델과 문서 문자열을 다시 생성한 뒤 worker thread에서 검색)
+        tab_info['search_status_label'].config(text="검색 중...")
+        layout_model = self.get_layout_model(device_id)
+        self.start_search_job(device_id, 'text_find_job', layout_model.iter_find_text(search_term),
+                              lambda batch: self.on_text_find_batch(device_id, layout_model, search_term, batch),
+                              lambda error: self.on_text_find_done(device_id, error))
+
+    def on_text_find_batch(self, device_id, layout_model, search_term, batch):
+        """레이아웃 텍스트 검색 결과 일부를 Tk index로 바꿔서 하이라이트 (열은 Python 문자 수 -> Tk 문자 수로 변환)"""
+        tab_info = self.device_tabs[device_id]
+        term_length = tk_char_count(search_term)
+        positions = []
+        for line_num, col in batch:
+            tk_col = tk_char_count(layout_model.lines[line_num - 1][:col])
+            positions.append((f"{line_num}.{tk_col}", f"{line_num}.{tk_col + term_length}"))
+        tab_info['search_positions'].extend(positions)
+        self.add_tag_ranges(tab_info['layout_text'], "search_highlight", positions)
+
+        if tab_info['current_search_index'] < 0:
             tab_info['current_search_index'] = 0
             self.highlight_current_search(device_id)
-            messagebox.showinfo("검색 결과", f"{len(tab_info['search_positions'])}개 항목을 찾았습니다.")
+        tab_info['search_status_label'].config(
+            text=f"{tab_info['current_search_index'] + 1} / {len(tab_info['search_positions'])}건...")
+
+    def on_text_find_done(self, device_id, error):
+        """레이아웃 텍스트 검색 완료 시 건수 표시"""
+        tab_info = self.device_tabs[device_id]
+        if error is not None:
+            tab_info['search_status_label'].config(text=f"검색 실패: {error}")
+        elif tab_info['search_positions']:
+            tab_info['search_status_label'].config(
+                text=f"{tab_info['current_search_index'] + 1} / {len(tab_info['search_positions'])}건")
         else:
-            messagebox.showinfo("검색 결과", "검색 결과가 없습니다.")
+            tab_info['search_status_label'].config(text="검색 결과 없음")
 
     def search_next(self, event, device_id):
         """다음 검색 결과로 이동 (F4)"""
@@ -1384,7 +3248,7 @@ class ScreenLayoutCapture:
             tab_info['current_search_index'] += 1
             self.highlight_current_search(device_id)
         else:
-            messagebox.showinfo("검색", "마지막 검색 결과입니다.")
+            tab_info['search_status_label'].config(text=f"마지막 결과 ({len(tab_info['search_positions'])}건)")
 
         return "break"
 
@@ -1402,7 +3266,7 @@ class ScreenLayoutCapture:
             tab_info['current_search_index'] -= 1
             self.highlight_current_search(device_id)
         else:
-            messagebox.showinfo("검색", "첫 번째 검색 결과입니다.")
+            tab_info['search_status_label'].config(text=f"첫 번째 결과 ({len(tab_info['search_positions'])}건)")
 
         return "break"
 
@@ -1425,6 +3289,9 @@ class ScreenLayoutCapture:
             # 해당 위치로 스크롤
             tab_info['layout_text'].see(pos)
 
+            tab_info['search_status_label'].config(
+                text=f"{tab_info['current_search_index'] + 1} / {len(tab_info['search_positions'])}건")
+
     def on_ctrl_press(self, event):
         self.ctrl_pressed = True
 
@@ -1434,6 +3301,7 @@ class ScreenLayoutCapture:
     def on_closing(self):
         """창 닫기 처리 - 시스템 트레이로 이동 (요청사항 3)"""
         if self.ctrl_pressed:
+            self.device_watcher_stop.set()
             if self.tray_icon:
                 try:
                     self.tray_icon.visible = False
@@ -1494,6 +3362,7 @@ class ScreenLayoutCapture:
 
     def quit_from_tray(self, icon=None, item=None):
         """트레이에서 종료"""
+        self.device_watcher_stop.set()
         if self.tray_icon:
             try:
                 self.tray_icon.visible = False
@@ -1513,22 +3382,132 @@ class ScreenLayoutCapture:
             except Exception:
                 pass
 
+    def adb_devices(self):
+        """연결된 디바이스 목록 [(serial, state), ...] (adb 서버 연결 실패 시 adb devices 실행)"""
+        try:
+            return self.adb.devices()
+        except (OSError, AdbError):
+            result = subprocess.run(['adb', 'devices'], capture_output=True, text=True, check=True)
+            return self.adb.parse_device_list(result.stdout)
+
+    def adb_shell(self, device_id, args, check=True):
+        """
+        adb shell 명령 실행 후 stdout 문자열 반환 (check가 True이면 종료 코드가 0이 아닐 때 CalledProcessError).
+        args가 문자열이면 파이프 등을 포함한 shell 명령줄로 그대로 전달한다.
+        adb 서버에 연결하지 못했거나 shell v2를 지원하지 않는 경우에만 adb 프로세스로 fallback
+        (명령 실행 도중의 오류는 명령을 다시 실행하지 않도록 그대로 전달).
+        """
+        if isinstance(args, str):
+            command, args = args, [args]
+        else:
+            command = shlex.join(args)
+
+        try:
+            result = self.adb.shell(device_id, command)
+        except AdbConnectionError:
+            result = subprocess.run(['adb', '-s', device_id, 'shell'] + args, capture_output=True,
+                                    text=True, check=check, encoding='utf-8', errors='replace')
+            return result.stdout
+
+        if check and result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, ['adb', '-s', device_id, 'shell'] + args,
+                                                result.stdout, result.stderr)
+        return result.stdout.decode('utf-8', errors='replace').replace('\r\n', '\n')
+
+    def adb_exec_out(self, device_id, args, check=True):
+        """
+        adb exec-out 명령 실행 후 바이너리 출력 반환 (adb 서버 연결 실패 시에만 adb 프로세스로 fallback).
+        exec: 서비스는 종료 코드를 전달하지 않으므로 check는 fallback에만 적용된다.
+        """
+        try:
+            return self.adb.exec_out(device_id, shlex.join(args))
+        except AdbConnectionError:
+            result = subprocess.run(['adb', '-s', device_id, 'exec-out'] + args, capture_output=True, check=check)
+            return result.stdout
+
+    def adb_pull_bytes(self, device_id, remote_path):
+        """디바이스 파일 내용을 bytes로 가져오기 (adb 서버 연결 실패 시 adb pull로 fallback)"""
+        try:
+            return self.adb.pull(device_id, remote_path)
+        except (OSError, AdbError):
+            local_path = f'temp_pull_{device_id}_{os.getpid()}'
+            try:
+                subprocess.run(['adb', '-s', device_id, 'pull', remote_path, local_path],
+                               check=True, capture_output=True)
+                with open(local_path, 'rb') as f:
+                    return f.read()
+            finally:
+                # 임시 파일 삭제
+                if os.path.exists(local_path):
+                    os.remove(local_path)
+
     def load_devices(self):
         """연결된 디바이스 목록 로드"""
         try:
-            result = subprocess.run(['adb', 'devices'], capture_output=True, text=True, check=True)
-            lines = result.stdout.strip().split('\n')[1:]  # 첫 번째 헤더 라인 제외
+            devices = self.adb_devices()
 
             self.device_listbox.delete(0, tk.END)
-            for line in lines:
-                if line.strip() and '\tdevice' in line:
-                    device_id = line.split('\t')[0]
+            for device_id, state in devices:
+                if state == 'device':
                     self.device_listbox.insert(tk.END, device_id)
         except subprocess.CalledProcessError:
             messagebox.showerror("오류", "ADB를 찾을 수 없거나 디바이스를 읽을 수 없습니다.")
         except FileNotFoundError:
             messagebox.showerror("오류", "ADB가 설치되어 있지 않거나 PATH에 없습니다.")
 
+    def start_device_watcher(self):
+        """host:track-devices 스트림을 읽는 백그라운드 스레드 시작"""
+        def on_change(devices):
+            # UI 업데이트는 메인 스레드에서 실행
+            self.root.after(0, lambda: self.on_devices_changed(devices))
+
+        watcher_thread = threading.Thread(target=self.adb.track_devices,
+                                          args=(on_change, self.device_watcher_stop), daemon=True)
+        watcher_thread.start()
+
+    def on_devices_changed(self, devices):
+        """track-devices 이벤트: 디바이스 목록과 캡처 탭 상태를 변경된 부분만 갱신"""
+        new_states = dict(devices)
+
+        # 상태가 바뀐 디바이스는 풀에 남아 있는 연결과 디바이스 정보 캐시 정리
+        for device_id in set(self.device_states) | set(new_states):
+            if self.device_states.get(device_id) != new_states.get(device_id):
+                self.adb.invalidate(device_id)
+                self.device_info_cache.pop(device_id, None)
+        self.device_states = new_states
+
+        online_devices = [device_id for device_id, state in devices if state == 'device']
+
+        # 사라진 디바이스만 리스트박스에서 제거 (인덱스가 밀리지 않도록 뒤에서부터)
+        listed_devices = list(self.device_listbox.get(0, tk.END))
+        for index in range(len(listed_devices) - 1, -1, -1):
+            if listed_devices[index] not in online_devices:
+                self.device_listbox.delete(index)
+
+        # 새로 연결된 디바이스만 추가
+        for device_id in online_devices:
+            if device_id not in listed_devices:
+                self.device_listbox.insert(tk.END, device_id)
+
+        # 캡처 탭에 디바이스 연결 상태 표시
+        for device_id in self.device_tabs:
+            self.set_tab_online(device_id, device_id in online_devices)
+
+    def set_tab_online(self, device_id, online):
+        """캡처 탭 제목과 디바이스 라벨에 온라인/오프라인 상태 표시"""
+        tab_info = self.device_tabs[device_id]
+        if tab_info['online'] == online:
+            return
+
+        tab_info['online'] = online
+        tab_title = f"Screen & Layout Capture({device_id})"
+        if online:
+            self.notebook.tab(tab_info['tab'], text=tab_title)
+            tab_info['current_device_label'].configure(text=f"디바이스: {device_id}", foreground="green")
+        else:
+            self.notebook.tab(tab_info['tab'], text=f"{tab_title} [offline]")
+            tab_info['current_device_label'].configure(text=f"디바이스: {device_id} (offline)", foreground="red")
+
     def on_device_select(self, event):
         """디바이스 선택 이벤트"""
         selection = self.device_listbox.curselection()
@@ -1551,50 +3530,53 @@ class ScreenLayoutCapture:
                 self.reload_capture(device_id)
 
     def get_device_info(self):
-        """선택된 디바이스의 상세 정보 가져오기"""
+        """선택된 디바이스의 상세 정보 가져오기 (캐시가 없으면 백그라운드에서 조회)"""
         if not self.current_device:
             return
 
-        try:
-            # 디바이스 속성 정보 가져오기
-            result = subprocess.run(['adb', '-s', self.current_device, 'shell', 'getprop'],
-                                    capture_output=True, text=True, check=True, encoding='utf-8')
-
-            # 주요 정보만 필터링
-            important_props = [
-                'ro.product.model', 'ro.product.brand', 'ro.product.manufacturer',
-                'ro.build.version.release', 'ro.build.version.sdk',
-                'ro.product.cpu.abi', 'ro.build.display.id'
-            ]
-
-            info_text = f"Device ID: {self.current_device}\n\n"
-
-            for line in result.stdout.split('\n'):
-                for prop in important_props:
-                    if f'[{prop}]' in line:
-                        value = line.split(']: [')[1].rstrip(']') if ']: [' in line else 'Unknown'
-                        prop_name = prop.replace('ro.product.', '').replace('ro.build.', '').replace('.', ' ').title()
-                        info_text += f"{prop_name}: {value}\n"
-
-            # 요청사항 2: mViewports 정보 추가
+        device_id = self.current_device
+        cached = self.device_info_cache.get(device_id)
+        if cached and time.monotonic() - cached[0] < DEVICE_INFO_CACHE_TTL:
+            self.show_device_info(device_id, cached[1])
+            return
+
+        self.show_device_info(device_id, f"Device ID: {device_id}\n\n조회 중...")
+
+        def fetch():
             try:
-                display_result = subprocess.run(['adb', '-s', self.current_device, 'shell', 'dumpsys', 'display'],
-                                                capture_output=True, text=True, check=True, encoding='utf-8')
+                info_text = self.fetch_device_info(device_id)
+                self.device_info_cache[device_id] = (time.monotonic(), info_text)
+            except (subprocess.CalledProcessError, OSError, AdbError) as e:
+                info_text = f"디바이스 정보를 가져올 수 없습니다: {e}"
+            # UI 업데이트는 메인 스레드에서 실행
+            self.root.after(0, lambda: self.show_device_info(device_id, info_text))
+
+        self.capture_executor.submit(fetch)
+
+    def show_device_info(self, device_id, info_text):
+        """디바이스 정보 표시 (그 사이 다른 디바이스가 선택되었으면 무시)"""
+        if device_id != self.current_device:
+            return
+
+        self.device_info_text.delete(1.0, tk.END)
+        self.device_info_text.insert(1.0, info_text)
 
-                # mViewports 정보 추출
-                viewport_info = self.extract_viewport_info(display_result.stdout)
-                if viewport_info:
-                    info_text += f"\n{viewport_info}"
+    def fetch_device_info(self, device_id):
+        """주요 속성과 mViewports 정보를 한 번의 shell 호출로 조회 (UI에 접근하지 않음)"""
+        output = self.adb_shell(device_id, DEVICE_INFO_COMMAND)
 
-            except subprocess.CalledProcessError:
-                pass  # dumpsys display 실패 시 무시
+        info_text = f"Device ID: {device_id}\n\n"
 
-            self.device_info_text.delete(1.0, tk.END)
-            self.device_info_text.insert(1.0, info_text)
+        for prop, value in PROP_LINE_PATTERN.findall(output):
+            prop_name = prop.replace('ro.product.', '').replace('ro.build.', '').replace('.', ' ').title()
+            info_text += f"{prop_name}: {value}\n"
 
-        except subprocess.CalledProcessError as e:
-            self.device_info_text.delete(1.0, tk.END)
-            self.device_info_text.insert(1.0, f"디바이스 정보를 가져올 수 없습니다: {e}")
+        # 요청사항 2: mViewports 정보 추가
+        viewport_info = self.extract_viewport_info(output)
+        if viewport_info:
+            info_text += f"\n{viewport_info}"
+
+        return info_text
 
     def extract_viewport_info(self, dumpsys_output):
         """dumpsys display 출력에서 mViewports 정보 추출 (요청사항 2)"""
@@ -1603,8 +3585,7 @@ class ScreenLayoutCapture:
             for line in dumpsys_output.split('\n'):
                 if 'mViewports=' in line:
                     # DisplayViewport 패턴 찾기
-                    pattern = r'DisplayViewport\{[^}]*displayId=(\d+)[^}]*deviceWidth=(\d+)[^}]*deviceHeight=(\d+)[^}]*\}'
-                    matches = re.findall(pattern, line)
+                    matches = VIEWPORT_PATTERN.findall(line)
 
                     if matches:
                         result = ""
@@ -1619,11 +3600,24 @@ class ScreenLayoutCapture:
         except Exception:
             return None
 
+    def on_reload_button(self, device_id):
+        """reload cap 버튼: 진행 중이면 취소, 아니면 새로 캡처"""
+        if device_id not in self.device_tabs:
+            return
+
+        if self.device_tabs[device_id]['reload_token'] is not None:
+            self.cancel_reload(device_id)
+        else:
+            self.reload_capture(device_id)
+
     def reload_capture(self, device_id):
-        """화면 및 레이아웃 캡처 새로고침"""
+        """화면 및 레이아웃 캡처 새로고침 (백그라운드에서 동시에 실행)"""
         if device_id not in self.device_tabs:
             return
 
+        # 이전 reload가 진행 중이면 결과를 버리고 새로 시작
+        self.cancel_reload(device_id)
+
         # ID 업데이트
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         current_id = f"{timestamp}_{device_id}"
@@ -1632,32 +3626,137 @@ class ScreenLayoutCapture:
         tab_info['id_entry'].delete(0, tk.END)
         tab_info['id_entry'].insert(0, current_id)
 
-        # 화면 캡처
-        self.capture_screen(device_id)
+        # 화면 캡처와 레이아웃 캡처를 동시에 실행
+        token = object()
+        screen_future = self.capture_executor.submit(self.grab_screen_image, device_id)
+        layout_future = self.capture_executor.submit(self.fetch_layout, device_id)
+        tab_info['reload_token'] = token
+        tab_info['reload_futures'] = (screen_future, layout_future)
+        self.set_reload_busy(device_id, True)
+
+        def wait_results():
+            results = {}
+            for key, future in (('screen', screen_future), ('layout', layout_future)):
+                try:
+                    results[key] = (future.result(), None)
+                except CancelledError:
+                    return
+                except Exception as e:
+                    results[key] = (None, e)
+
+            # UI 업데이트는 메인 스레드에서 한 번에 실행
+            self.root.after(0, lambda: self.finish_reload(device_id, token, results))
 
-        # 레이아웃 캡처
-        self.capture_layout(device_id)
+        threading.Thread(target=wait_results, daemon=True).start()
 
-    def capture_screen(self, device_id):
-        """화면 캡처"""
+    def cancel_reload(self, device_id):
+        """진행 중인 reload 취소 (이미 실행 중인 adb 명령의 결과는 버림)"""
         if device_id not in self.device_tabs:
             return
 
-        try:
-            # ADB로 스크린샷 캡처
-            subprocess.run(['adb', '-s', device_id, 'shell', 'screencap', '/sdcard/screenshot.png'], check=True)
-            subprocess.run(['adb', '-s', device_id, 'pull', '/sdcard/screenshot.png', f'temp_screenshot_{device_id}.png'], check=True)
+        tab_info = self.device_tabs[device_id]
+        if tab_info['reload_token'] is None:
+            return
+
+        for future in tab_info['reload_futures']:
+            future.cancel()
+        tab_info['reload_token'] = None
+        tab_info['reload_futures'] = ()
+        self.set_reload_busy(device_id, False)
+
+    def set_reload_busy(self, device_id, busy):
+        """탭별 캡처 진행 표시 및 reload 버튼 상태 변경"""
+        tab_info = self.device_tabs[device_id]
+        if busy:
+            tab_info['reload_button'].configure(text="cancel")
+            tab_info['reload_progress'].pack(side=tk.LEFT, padx=(5, 0))
+            tab_info['reload_progress'].start(10)
+        else:
+            tab_info['reload_button'].configure(text="reload cap")
+            tab_info['reload_progress'].stop()
+            tab_info['reload_progress'].pack_forget()
 
-            # 이미지 로드 및 표시
-            original_image = Image.open(f'temp_screenshot_{device_id}.png')
-            self.device_tabs[device_id]['original_image'] = original_image
+    def finish_reload(self, device_id, token, results):
+        """백그라운드 캡처 결과를 한 번에 UI에 반영"""
+        if device_id not in self.device_tabs:
+            return
+
+        tab_info = self.device_tabs[device_id]
+        # 취소되었거나 더 새로운 reload가 시작된 경우 결과 무시
+        if tab_info['reload_token'] is not token:
+            return
+
+        tab_info['reload_token'] = None
+        tab_info['reload_futures'] = ()
+        self.set_reload_busy(device_id, False)
+
+        errors = []
+
+        original_image, screen_error = results['screen']
+        if screen_error is None:
+            self.set_original_image(device_id, original_image)
             self.display_image(device_id)
+        else:
+            errors.append(f"화면 캡처 실패: {screen_error}")
 
-            # 임시 파일 삭제
-            os.remove(f'temp_screenshot_{device_id}.png')
+        layout_result, layout_error = results['layout']
+        if layout_error is None:
+            self.apply_layout(device_id, *layout_result)
+        else:
+            errors.append(self.describe_layout_error(layout_error))
+
+        if errors:
+            messagebox.showerror("오류", "\n".join(errors))
+
+    def grab_screen_image(self, device_id):
+        """스크린샷 이미지 획득 (raw -> PNG stream -> screencap + pull 순서로 fallback)"""
+        fallback_errors = (ValueError, OSError, AdbError, subprocess.CalledProcessError)
+
+        # raw 모드: 디바이스의 PNG 인코딩과 PIL의 PNG 디코딩을 모두 생략
+        if screencap_mode == 'raw':
+            try:
+                return self.capture_screen_raw(device_id)
+            except fallback_errors:
+                pass
+
+        # exec-out 스트림으로 PNG를 메모리에서 바로 디코딩
+        # (바이너리 출력을 망가뜨리는 디바이스는 기존 screencap + pull 방식으로 fallback)
+        try:
+            return self.capture_screen_stream(device_id)
+        except fallback_errors:
+            return self.capture_screen_pull(device_id)
 
-        except subprocess.CalledProcessError as e:
-            messagebox.showerror("오류", f"화면 캡처 실패: {e}")
+    def capture_screen_raw(self, device_id):
+        """adb exec-out screencap (-p 없이) 출력을 읽어 framebuffer 그대로 이미지로 감싸기"""
+        raw_data = self.adb_exec_out(device_id, ['screencap'])
+        return decode_raw_screencap(raw_data)
+
+    def capture_screen_stream(self, device_id):
+        """adb exec-out screencap -p 출력을 메모리 버퍼로 받아 이미지로 변환"""
+        png_data = self.adb_exec_out(device_id, ['screencap', '-p'])
+
+        # 개행 변환 등으로 바이너리가 깨진 경우 PNG 시그니처가 맞지 않음
+        if not png_data.startswith(PNG_SIGNATURE):
+            raise ValueError("screencap 출력이 올바른 PNG가 아닙니다.")
+
+        image = Image.open(BytesIO(png_data))
+        image.load()
+        return image
+
+    def capture_screen_pull(self, device_id):
+        """기존 방식: 디바이스에 PNG 저장 후 pull로 가져오기"""
+        # 여러 인스턴스가 같은 디바이스를 캡처해도 충돌하지 않도록 파일명에 pid 포함
+        remote_path = f'/sdcard/screenshot_{os.getpid()}.png'
+
+        try:
+            self.adb_shell(device_id, ['screencap', remote_path])
+            png_data = self.adb_pull_bytes(device_id, remote_path)
+
+            image = Image.open(BytesIO(png_data))
+            image.load()
+            return image
+        finally:
+            self.adb_shell(device_id, ['rm', '-f', remote_path], check=False)
 
     def display_image(self, device_id):
         """캔버스에 이미지 표시 (축소 비율 적용, 요청사항 1)"""
@@ -1676,87 +3775,307 @@ class ScreenLayoutCapture:
         new_width = int(original_image.width * scale_ratio)
         new_height = int(original_image.height * scale_ratio)
 
-        # 이미지 리사이즈
-        resized_image = original_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        screen_image = ImageTk.PhotoImage(resized_image)
-        tab_info['screen_image'] = screen_image
+        # 캐시에 고품질 축소 이미지가 있으면 바로 사용, 없으면 빠른 축소로 먼저 표시하고 고품질은 백그라운드에서 생성
+        key = (tab_info['capture_seq'], tab_info['current_scale'])
+        cached = tab_info['scaled_cache'].get(key)
+        if cached:
+            tab_info['scaled_cache'].move_to_end(key)
+            screen_image = cached[0]
+        elif (new_width, new_height) == original_image.size:
+            screen_image = original_image
+            self.put_scaled_image(tab_info, key, screen_image)
+        else:
+            screen_image = original_image.resize((new_width, new_height), Image.Resampling.NEAREST)
+            self.start_high_quality_resize(device_id, key, (new_width, new_height))
+        tab_info['screen_image'] = self.apply_wireframe(device_id, screen_image, cacheable=key in tab_info['scaled_cache'])
 
-        # 캔버스 클리어 후 이미지 표시 (왼쪽 정렬 - x=0)
+        # 캔버스 클리어 후 이미지 영역 표시 (왼쪽 정렬 - x=0, 그림은 보이는 타일만 생성)
         screen_canvas.delete("all")
-        canvas_image = screen_canvas.create_image(0, 0, anchor=tk.NW, image=screen_image)
+        tab_info['screen_tiles'] = {}
+        tab_info['hover_rect'] = None
+        tab_info['hover_node'] = None
+        canvas_image = screen_canvas.create_rectangle(0, 0, new_width, new_height, outline="", fill="")
         tab_info['canvas_image'] = canvas_image
 
         # 스크롤 영역 설정 (리사이즈된 이미지 크기로 설정)
         screen_canvas.configure(scrollregion=(0, 0, new_width, new_height))
+        self.render_visible_tiles(device_id)
 
         # 요청사항 1: 좌표 라벨에 이미지 Resolution 표시
         if tab_info.get('coords_label'):
             resolution = f"{original_image.width}x{original_image.height}"
             tab_info['coords_label'].configure(text=f"이미지 Resolution : {resolution}, 좌표 : (-,-)")
 
-    def capture_layout(self, device_id):
-        """레이아웃 캡처 (UI Automator dump)"""
+    def set_original_image(self, device_id, image):
+        """새 스크린샷 설정 (이전 캡처의 축소 이미지 캐시는 비움)"""
+        tab_info = self.device_tabs[device_id]
+
+        # 백그라운드 축소와 동시에 읽히므로 지연 로딩(PNG)을 여기서 끝냄
+        image.load()
+        tab_info['original_image'] = image
+        tab_info['capture_seq'] += 1
+        tab_info['scaled_cache'].clear()
+        tab_info['scaled_cache_bytes'] = 0
+
+    def put_scaled_image(self, tab_info, key, image):
+        """축소 이미지 캐시에 추가하고 SCALED_IMAGE_CACHE_BYTES를 넘으면 오래된 것부터 제거 (방금 넣은 것은 유지)"""
+        size = image.width * image.height * 4
+        cache = tab_info['scaled_cache']
+        if key in cache:
+            tab_info['scaled_cache_bytes'] -= cache.pop(key)[1]
+        cache[key] = (image, size)
+        tab_info['scaled_cache_bytes'] += size
+
+        while tab_info['scaled_cache_bytes'] > SCALED_IMAGE_CACHE_BYTES and len(cache) > 1:
+            _, (_, evicted_size) = cache.popitem(last=False)
+            tab_info['scaled_cache_bytes'] -= evicted_size
+
+    def start_high_quality_resize(self, device_id, key, size):
+        """LANCZOS 축소를 백그라운드에서 실행하고 끝나면 캔버스 이미지를 교체"""
+        tab_info = self.device_tabs[device_id]
+        if key in tab_info['scaled_pending']:
+            return
+        tab_info['scaled_pending'].add(key)
+
+        original_image = tab_info['original_image']
+
+        def resize():
+            resized_image = original_image.resize(size, Image.Resampling.LANCZOS)
+            self.root.after(0, lambda: self.on_high_quality_resized(device_id, key, resized_image))
+
+        threading.Thread(target=resize, daemon=True).start()
+
+    def on_high_quality_resized(self, device_id, key, resized_image):
+        """고품질 축소 이미지를 캐시에 넣고, 아직 같은 캡처/비율을 보고 있으면 캔버스 이미지 교체"""
         if device_id not in self.device_tabs:
             return
 
-        try:
-            # uiautomator로 덤프 생성하여 /sdcard/layout.xml에 저장
-            subprocess.run(['adb', '-s', device_id, 'shell', 'uiautomator', 'dump', '/sdcard/layout.xml'],
-                           check=True, capture_output=True, text=True)
+        tab_info = self.device_tabs[device_id]
+        tab_info['scaled_pending'].discard(key)
+        if key[0] != tab_info['capture_seq']:
+            return  # 그 사이 새로 캡처됨
 
-            # 충분한 대기 시간 확보 (파일 생성 및 저장 완료 대기)
-            time.sleep(3)
+        self.put_scaled_image(tab_info, key, resized_image)
 
-            # adb pull 명령어를 통해 PC로 파일 가져오기
-            subprocess.run(['adb', '-s', device_id, 'pull', '/sdcard/layout.xml', f'temp_layout_{device_id}.xml'],
-                           check=True)
+        if key == (tab_info['capture_seq'], tab_info['current_scale']) and tab_info['canvas_image']:
+            # 보이는 타일만 고품질 이미지로 다시 생성
+            tab_info['screen_image'] = self.apply_wireframe(device_id, resized_image, cacheable=True)
+            self.clear_screen_tiles(device_id)
+            self.render_visible_tiles(device_id)
 
-            # PC로 가져온 파일 읽기
-            # for stp_mode
-            tmp_file_name = 'temp.xml' if is_stp_mode else f'temp_layout_{device_id}.xml'
+    def apply_wireframe(self, device_id, screen_image, cacheable):
+        """wireframe 표시 중이면 node bounds layer를 합성한 이미지 반환 (고품질 이미지의 합성 결과는 축소 이미지 캐시에 같이 저장)"""
+        tab_info = self.device_tabs[device_id]
+        if not tab_info['wireframe_var'].get():
+            return screen_image
+
+        layout_model = self.get_layout_model(device_id)
+        if not layout_model.nodes:
+            return screen_image
+
+        colored = tab_info['wireframe_color_var'].get()
+        key = (tab_info['capture_seq'], tab_info['current_scale'], tab_info['layout_seq'], colored)
+        cached = tab_info['scaled_cache'].get(key)
+        if cached:
+            tab_info['scaled_cache'].move_to_end(key)
+            return cached[0]
+
+        composed = compose_wireframe(screen_image, layout_model.nodes, tab_info['current_scale'] / 100.0, colored)
+        if cacheable:
+            self.put_scaled_image(tab_info, key, composed)
+        return composed
+
+    def on_screen_canvas_view(self, device_id, scrollbar, first, last):
+        """화면 캔버스의 보이는 영역이 바뀔 때 스크롤바 갱신 + 타일 렌더링 예약"""
+        scrollbar.set(first, last)
+        self.schedule_tile_render(device_id)
+
+    def schedule_tile_render(self, device_id):
+        """연속된 스크롤 이벤트를 모아서 idle 시점에 한 번만 타일 렌더링"""
+        if device_id not in self.device_tabs:
+            return
 
-            with open(tmp_file_name, 'r', encoding='utf-8') as f:
-                xml_content = f.read()
+        tab_info = self.device_tabs[device_id]
+        if not tab_info['tile_render_pending']:
+            tab_info['tile_render_pending'] = True
+            self.root.after_idle(lambda: self.render_visible_tiles(device_id))
+
+    def render_visible_tiles(self, device_id):
+        """보이는 영역과 겹치는 타일만 PhotoImage로 만들고, 벗어난 타일은 제거"""
+        if device_id not in self.device_tabs:
+            return
 
-            # XML을 pretty print 형태로 변환
+        tab_info = self.device_tabs[device_id]
+        tab_info['tile_render_pending'] = False
+        screen_image = tab_info['screen_image']
+        if screen_image is None or not tab_info['canvas_image']:
+            return
+
+        screen_canvas = tab_info['screen_canvas']
+        tiles = tab_info['screen_tiles']
+
+        # 보이는 캔버스 좌표 범위 (+ 여유분)
+        left = screen_canvas.canvasx(0) - SCREEN_TILE_MARGIN
+        top = screen_canvas.canvasy(0) - SCREEN_TILE_MARGIN
+        right = screen_canvas.canvasx(screen_canvas.winfo_width()) + SCREEN_TILE_MARGIN
+        bottom = screen_canvas.canvasy(screen_canvas.winfo_height()) + SCREEN_TILE_MARGIN
+
+        tx1 = max(0, int(left) // SCREEN_TILE_SIZE)
+        ty1 = max(0, int(top) // SCREEN_TILE_SIZE)
+        tx2 = min((screen_image.width - 1) // SCREEN_TILE_SIZE, int(right) // SCREEN_TILE_SIZE)
+        ty2 = min((screen_image.height - 1) // SCREEN_TILE_SIZE, int(bottom) // SCREEN_TILE_SIZE)
+        visible = {(tx, ty) for tx in range(tx1, tx2 + 1) for ty in range(ty1, ty2 + 1)}
+
+        # 화면에서 벗어난 타일 제거
+        for tile_key in [tile_key for tile_key in tiles if tile_key not in visible]:
+            screen_canvas.delete(tiles.pop(tile_key)[1])
+
+        # 새로 보이는 타일 생성 (선택 영역/하이라이트 등 다른 item보다 아래에 둠)
+        for tx, ty in sorted(visible - tiles.keys()):
+            x, y = tx * SCREEN_TILE_SIZE, ty * SCREEN_TILE_SIZE
+            box = (x, y, min(x + SCREEN_TILE_SIZE, screen_image.width), min(y + SCREEN_TILE_SIZE, screen_image.height))
+            photo = ImageTk.PhotoImage(screen_image.crop(box))
+            tile_item = screen_canvas.create_image(x, y, anchor=tk.NW, image=photo)
+            screen_canvas.tag_lower(tile_item)
+            tiles[(tx, ty)] = (photo, tile_item)
+
+    def clear_screen_tiles(self, device_id):
+        """화면 캔버스의 타일을 모두 제거"""
+        tab_info = self.device_tabs[device_id]
+        for _, tile_item in tab_info['screen_tiles'].values():
+            tab_info['screen_canvas'].delete(tile_item)
+        tab_info['screen_tiles'] = {}
+
+    def fetch_layout(self, device_id):
+        """레이아웃 덤프 후 pretty print 된 XML, 레이아웃 모델, 덤프 소요 시간 반환 (UI에 접근하지 않음)"""
+        xml_content, dump_elapsed = self.dump_layout_xml(device_id)
+
+        # XML을 pretty print 형태로 변환하면서 클릭/검색에 사용할 레이아웃 모델도 함께 생성
+        try:
+            layout_xml, layout_model = format_layout_xml(xml_content)
+        except ValueError:
             root = ET.fromstring(xml_content)
             rough_string = ET.tostring(root, 'unicode')
             reparsed = xml.dom.minidom.parseString(rough_string)
             layout_xml = reparsed.toprettyxml(indent="  ")
+            layout_model = None
+
+        # for stp_mode
+        if is_stp_mode:
+            stripped_xml = layout_xml.replace('\r\n', '').replace('\r', '')
+            if stripped_xml != layout_xml:
+                layout_xml, layout_model = stripped_xml, None
 
-            # for stp_mode
-            if is_stp_mode:
-                layout_xml = layout_xml.replace('\r\n', '').replace('\r', '')
+        # 라인 번호가 바뀌었거나 기존 방식으로 변환한 경우 텍스트에서 모델 생성
+        if layout_model is None:
+            layout_model = LayoutModel.from_text(layout_xml)
 
-            # 텍스트 위젯에 표시
-            tab_info = self.device_tabs[device_id]
-            tab_info['layout_text'].delete(1.0, tk.END)
-            tab_info['layout_text'].insert(1.0, layout_xml)
+        return layout_xml, layout_model, dump_elapsed
 
-            # Undo/Redo 상태 저장
-            self.save_text_state(device_id)
+    def apply_layout(self, device_id, layout_xml, layout_model, dump_elapsed):
+        """레이아웃 캡처 결과를 탭에 표시"""
+        if device_id not in self.device_tabs:
+            return
 
-            # 줄번호 갱신
-            self.update_line_numbers(device_id)
+        # 이전 레이아웃에 대한 검색 중단
+        self.cancel_search_job(device_id, 'layout_search_job')
+        self.cancel_search_job(device_id, 'text_find_job')
 
-            # layout_text에 포커스 주기
-            tab_info['layout_text'].focus_set()
+        # 텍스트 위젯에 표시
+        tab_info = self.device_tabs[device_id]
+        tab_info['layout_text'].delete(1.0, tk.END)
+        tab_info['layout_text'].insert(1.0, layout_xml)
 
-            # 임시 파일 삭제
-            if os.path.exists(f'temp_layout_{device_id}.xml'):
-                os.remove(f'temp_layout_{device_id}.xml')
+        # 텍스트와 모델이 일치하므로 modified 플래그 초기화
+        tab_info['layout_model'] = layout_model
+        tab_info['layout_seq'] += 1
+        tab_info['layout_text'].edit_modified(False)
 
-        except subprocess.CalledProcessError as e:
-            messagebox.showerror("오류", f"레이아웃 캡처 실패: {e}")
-        except ET.ParseError as e:
-            messagebox.showerror("오류", f"XML 파싱 실패: {e}")
-        except FileNotFoundError as e:
-            messagebox.showerror("오류", f"파일을 찾을 수 없습니다: {e}")
-        except Exception as e:
-            messagebox.showerror("오류", f"레이아웃 캡처 중 오류 발생: {e}")
-            # 임시 파일 정리
-            if os.path.exists(f'temp_layout_{device_id}.xml'):
-                os.remove(f'temp_layout_{device_id}.xml')
+        # wireframe 표시 중이면 새 레이아웃으로 다시 그림
+        if tab_info['wireframe_var'].get() and tab_info['original_image']:
+            self.display_image(device_id)
+
+        # 덤프 소요 시간 표시
+        tab_info['dump_time_label'].configure(text=f"Dump : {dump_elapsed:.2f}s")
+
+        # Undo/Redo 상태 저장
+        self.save_text_state(device_id)
+
+        # 줄번호 갱신
+        self.update_line_numbers(device_id)
+
+        # layout_text에 포커스 주기
+        tab_info['layout_text'].focus_set()
+
+    def describe_layout_error(self, error):
+        """레이아웃 캡처 예외를 사용자 메시지로 변환"""
+        if isinstance(error, subprocess.CalledProcessError):
+            return f"레이아웃 캡처 실패: {error}"
+        if isinstance(error, ET.ParseError):
+            return f"XML 파싱 실패: {error}"
+        if isinstance(error, FileNotFoundError):
+            return f"파일을 찾을 수 없습니다: {error}"
+        if isinstance(error, TimeoutError):
+            return f"레이아웃 덤프 시간 초과: {error}"
+        return f"레이아웃 캡처 중 오류 발생: {error}"
+
+    def dump_layout_xml(self, device_id):
+        """uiautomator dump 결과 XML 문자열과 덤프 소요 시간(초)을 반환"""
+        start_time = time.perf_counter()
+
+        # for stp_mode
+        if is_stp_mode:
+            self.adb_shell(device_id, ['uiautomator', 'dump', '/sdcard/layout.xml'])
+            with open('temp.xml', 'r', encoding='utf-8') as f:
+                return f.read(), time.perf_counter() - start_time
+
+        # dump 결과를 /dev/tty로 바로 스트리밍 (명령이 끝나면 덤프도 완료된 상태)
+        try:
+            dump_output = self.adb_exec_out(device_id, ['uiautomator', 'dump', '/dev/tty'])
+            xml_content = self.extract_dumped_xml(dump_output.decode('utf-8', errors='replace'))
+            if xml_content:
+                return xml_content, time.perf_counter() - start_time
+        except subprocess.CalledProcessError:
+            pass
+
+        # 스트리밍이 안 되는 디바이스는 파일로 덤프 후 완전한 XML이 될 때까지 polling
+        remote_path = f'/sdcard/layout_{os.getpid()}.xml'
+        try:
+            self.adb_shell(device_id, ['uiautomator', 'dump', remote_path])
+            xml_content = self.wait_for_layout_file(device_id, remote_path)
+            return xml_content, time.perf_counter() - start_time
+        finally:
+            self.adb_shell(device_id, ['rm', '-f', remote_path], check=False)
+
+    def extract_dumped_xml(self, output):
+        """uiautomator dump 출력에서 XML 부분만 추출 (뒤에 붙는 'UI hierchary dumped to' 메시지 제거)"""
+        xml_start = output.find('<?xml')
+        if xml_start == -1:
+            xml_start = output.find('<hierarchy')
+        xml_end = output.rfind('</hierarchy>')
+        if xml_start == -1 or xml_end == -1:
+            return None
+        return output[xml_start:xml_end + len('</hierarchy>')]
+
+    def wait_for_layout_file(self, device_id, remote_path):
+        """디바이스의 덤프 파일이 파싱 가능한 완전한 XML이 될 때까지 짧은 backoff로 대기"""
+        deadline = time.monotonic() + LAYOUT_DUMP_TIMEOUT
+        delay = LAYOUT_POLL_INITIAL_DELAY
+
+        while True:
+            cat_output = self.adb_exec_out(device_id, ['cat', remote_path], check=False)
+            xml_content = self.extract_dumped_xml(cat_output.decode('utf-8', errors='replace'))
+            if xml_content:
+                try:
+                    ET.fromstring(xml_content)
+                    return xml_content
+                except ET.ParseError:
+                    pass
+
+            if time.monotonic() + delay > deadline:
+                raise TimeoutError(f"{remote_path} ({LAYOUT_DUMP_TIMEOUT:.0f}s)")
+            time.sleep(delay)
+            delay = min(delay * 2, LAYOUT_POLL_MAX_DELAY)
 
     def save_capture(self, device_id):
         """캡처 저장"""
@@ -1770,6 +4089,18 @@ class ScreenLayoutCapture:
             messagebox.showwarning("경고", "먼저 캡처를 실행하세요.")
             return
 
+        try:
+            self.write_capture_files(device_id)
+            messagebox.showinfo("성공", f"파일이 저장되었습니다:\n- img/{current_id}.png\n- layout/{current_id}.xml")
+
+        except Exception as e:
+            messagebox.showerror("오류", f"파일 저장 실패: {e}")
+
+    def write_capture_files(self, device_id):
+        """현재 탭의 이미지와 레이아웃을 img/, layout/ 디렉토리에 저장"""
+        tab_info = self.device_tabs[device_id]
+        current_id = tab_info['id_entry'].get()
+
         # 현재 프로그램 디렉토리 기준으로 디렉토리 생성
         current_dir = os.path.dirname(os.path.abspath(__file__))
         img_dir = os.path.join(current_dir, "img")
@@ -1780,32 +4111,144 @@ class ScreenLayoutCapture:
 
         saved_files = []
 
+        # 이미지 저장 (원본 크기로 저장)
+        if tab_info['original_image']:
+            img_path = os.path.join(img_dir, f"{current_id}.png")
+            tab_info['original_image'].save(img_path)
+            saved_files.append(("screen", f"img:{img_path}"))
+
+        # 레이아웃 저장 (현재 편집된 내용 저장)
+        layout_content = tab_info['layout_text'].get(1.0, tk.END)
+        if layout_content.strip():
+            layout_path = os.path.join(layout_dir, f"{current_id}.xml")
+            with open(layout_path, 'w', encoding='utf-8') as f:
+                f.write(layout_content)
+            saved_files.append(("layout", f"xml:{layout_path}"))
+
+        # 요청사항: 파일 경로를 각각의 라벨에 표시
+        for file_type, path_text in saved_files:
+            if file_type == "screen":
+                tab_info['screen_path_label'].configure(text=path_text)
+            elif file_type == "layout":
+                tab_info['layout_path_label'].configure(text=path_text)
+
+        return saved_files
+
+    def capture_all_devices(self, device_ids=None, save=True, on_complete=None):
+        """
+        목록의 모든 디바이스를 백그라운드에서 일괄 캡처 후 각 탭에 반영하고 저장.
+        완료되면 디바이스별 결과 목록을 on_complete(results)로 전달 (Tk 메인 스레드에서 호출).
+        """
+        if device_ids is None:
+            device_ids = list(self.device_listbox.get(0, tk.END))
+        if not device_ids:
+            messagebox.showwarning("경고", "캡처할 디바이스가 없습니다.")
+            return
+
+        self.capture_all_button.configure(state=tk.DISABLED)
+
+        def run():
+            results = self.collect_device_captures(device_ids)
+            self.root.after(0, lambda: self.finish_capture_all(results, save, on_complete))
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def collect_device_captures(self, device_ids, max_workers=CAPTURE_ALL_MAX_WORKERS,
+                                timeout=CAPTURE_ALL_TIMEOUT):
+        """
+        제한된 크기의 스레드 풀로 디바이스별 화면/레이아웃 캡처 실행 (UI에 접근하지 않음).
+        디바이스별로 캡처 시작 후 timeout을 넘기면 결과를 기다리지 않고 실패로 기록한다.
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        start_times = {}
+
+        # 멈춘 adb 명령이 worker를 계속 점유해 대기 중인 디바이스가 시작되지 못하는 경우를 위한 전체 제한 시간
+        overall_deadline = time.monotonic() + timeout * (len(device_ids) // max_workers + 1)
+
+        def capture_device(device_id):
+            start_times[device_id] = time.monotonic()
+            original_image = self.grab_screen_image(device_id)
+            layout_xml, layout_model, dump_elapsed = self.fetch_layout(device_id)
+            return original_image, layout_xml, layout_model, dump_elapsed
+
+        results = {}
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="capture-all")
         try:
-            # 이미지 저장 (원본 크기로 저장)
-            if tab_info['original_image']:
-                img_path = os.path.join(img_dir, f"{current_id}.png")
-                tab_info['original_image'].save(img_path)
-                saved_files.append(("screen", f"img:{img_path}"))
-
-            # 레이아웃 저장 (현재 편집된 내용 저장)
-            layout_content = tab_info['layout_text'].get(1.0, tk.END)
-            if layout_content.strip():
-                layout_path = os.path.join(layout_dir, f"{current_id}.xml")
-                with open(layout_path, 'w', encoding='utf-8') as f:
-                    f.write(layout_content)
-                saved_files.append(("layout", f"xml:{layout_path}"))
-
-            # 요청사항: 파일 경로를 각각의 라벨에 표시
-            for file_type, path_text in saved_files:
-                if file_type == "screen":
-                    tab_info['screen_path_label'].configure(text=path_text)
-                elif file_type == "layout":
-                    tab_info['layout_path_label'].configure(text=path_text)
+            futures = {executor.submit(capture_device, device_id): device_id for device_id in device_ids}
+            pending = set(futures)
+
+            while pending:
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                now = time.monotonic()
+
+                for future in done:
+                    device_id = futures[future]
+                    result = {'device_id': device_id, 'current_id': f"{timestamp}_{device_id}",
+                              'elapsed': now - start_times.get(device_id, now), 'error': None}
+                    try:
+                        (result['image'], result['layout_xml'], result['layout_model'],
+                         result['dump_elapsed']) = future.result()
+                    except Exception as e:
+                        result['error'] = e
+                    results[device_id] = result
+
+                # 디바이스별 제한 시간 초과 처리
+                for future in list(pending):
+                    device_id = futures[future]
+                    started = start_times.get(device_id)
+                    if (started is not None and now - started > timeout) or now > overall_deadline:
+                        pending.discard(future)
+                        results[device_id] = {'device_id': device_id, 'current_id': f"{timestamp}_{device_id}",
+                                              'elapsed': now - started if started is not None else 0.0,
+                                              'error': TimeoutError(f"{timeout:.0f}초 초과")}
+        finally:
+            # 시간 초과된 adb 명령은 기다리지 않음
+            executor.shutdown(wait=False, cancel_futures=True)
 
-            messagebox.showinfo("성공", f"파일이 저장되었습니다:\n- img/{current_id}.png\n- layout/{current_id}.xml")
+        return [results[device_id] for device_id in device_ids]
 
-        except Exception as e:
-            messagebox.showerror("오류", f"파일 저장 실패: {e}")
+    def finish_capture_all(self, results, save, on_complete):
+        """일괄 캡처 결과를 각 디바이스 탭에 반영하고 요약 표시"""
+        self.capture_all_button.configure(state=tk.NORMAL)
+
+        summary_lines = []
+        for result in results:
+            device_id = result['device_id']
+            if result['error'] is not None:
+                summary_lines.append(f"{device_id} : 실패 ({result['elapsed']:.1f}s) - {result['error']}")
+                continue
+
+            if device_id not in self.device_tabs:
+                self.create_capture_tab(device_id, reload=False)
+
+            # 진행 중인 개별 reload가 결과를 덮어쓰지 않도록 취소
+            self.cancel_reload(device_id)
+
+            tab_info = self.device_tabs[device_id]
+            tab_info['id_entry'].delete(0, tk.END)
+            tab_info['id_entry'].insert(0, result['current_id'])
+            self.set_original_image(device_id, result['image'])
+            self.display_image(device_id)
+            self.apply_layout(device_id, result['layout_xml'], result['layout_model'], result['dump_elapsed'])
+
+            status = "성공"
+            if save:
+                try:
+                    self.write_capture_files(device_id)
+                except Exception as e:
+                    status = f"저장 실패 - {e}"
+            summary_lines.append(f"{device_id} : {status} ({result['elapsed']:.1f}s, dump {result['dump_elapsed']:.1f}s)")
+
+        succeeded = sum(1 for result in results if result['error'] is None)
+        summary = f"전체 {len(results)}대 중 {succeeded}대 캡처 완료\n\n" + "\n".join(summary_lines)
+
+        self.device_info_text.delete(1.0, tk.END)
+        self.device_info_text.insert(1.0, summary)
+
+        if on_complete:
+            on_complete(results)
+        else:
+            messagebox.showinfo("모두 캡처", summary)
 
     def on_canvas_drag(self, event, device_id):
         """캔버스 드래그"""
@@ -1965,5 +4408,7 @@ class ScreenLayoutCapture:
 
 
 if __name__ == "__main__":
+    # 실행 파일로 묶었을 때 정규식 검색 process가 앱을 다시 실행하지 않도록 함
+    multiprocessing.freeze_support()
     app = ScreenLayoutCapture()
     app.run()
\ No newline at end of file
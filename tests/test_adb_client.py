@@ -0,0 +1,272 @@
+import os
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+# ScreenLayoutCapture는 import 시 GUI 관련 패키지를 함께 불러옴
+pytest.importorskip("PIL")
+pytest.importorskip("pystray")
+pytest.importorskip("requests")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ScreenLayoutCapture as slc  # noqa: E402
+from ScreenLayoutCapture import AdbClient, AdbConnectionError, AdbError  # noqa: E402
+
+SERIAL = 'emulator-5554'
+
+# shell 명령 -> (stdout, stderr, 종료 코드)
+SHELL_RESPONSES = {
+    'getprop ro.product.model': (b'Pixel\n', b'', 0),
+    'ls /missing': (b'', b'ls: /missing: No such file or directory\n', 1),
+}
+
+FILES = {
+    '/sdcard/a.txt': b'hello',
+    '/sdcard/big.bin': bytes(range(256)) * 1000,
+}
+
+
+def recv_exact(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise EOFError
+        data += chunk
+    return data
+
+
+def length_prefixed(payload):
+    return b'%04x' % len(payload) + payload
+
+
+def shell_packet(packet_id, data):
+    return bytes([packet_id]) + struct.pack('<I', len(data)) + data
+
+
+class FakeAdbHandler(socketserver.BaseRequestHandler):
+    """adb 서버의 smart-socket 프로토콜 중 AdbClient가 쓰는 부분만 흉내냄"""
+
+    def handle(self):
+        try:
+            self.serve()
+        except (EOFError, OSError):
+            pass
+
+    def read_request(self):
+        length = int(recv_exact(self.request, 4), 16)
+        return recv_exact(self.request, length).decode('utf-8')
+
+    def fail(self, message):
+        self.request.sendall(b'FAIL' + length_prefixed(message.encode('utf-8')))
+
+    def serve(self):
+        server = self.server
+        request = self.read_request()
+        server.requests.append(request)
+
+        if request == 'host:devices':
+            self.request.sendall(b'OKAY' + length_prefixed(f'{SERIAL}\tdevice\n'.encode('utf-8')))
+            return
+
+        if request == 'host:track-devices':
+            server.track_connections += 1
+            self.request.sendall(b'OKAY')
+            if server.track_connections == 1:
+                # 첫 연결은 목록을 한 번 보내고 끊어 adb 서버 재시작을 흉내냄
+                self.request.sendall(length_prefixed(f'{SERIAL}\toffline\n'.encode('utf-8')))
+                return
+            self.request.sendall(length_prefixed(f'{SERIAL}\tdevice\n'.encode('utf-8')))
+            self.request.recv(1)  # 클라이언트가 닫을 때까지 대기
+            return
+
+        if not request.startswith('host:transport:'):
+            self.fail(f'unknown host service {request}')
+            return
+        if request[len('host:transport:'):] != SERIAL:
+            self.fail(f"device '{request[len('host:transport:'):]}' not found")
+            return
+        self.request.sendall(b'OKAY')
+
+        service = self.read_request()
+        server.requests.append(service)
+        if service.startswith('shell,v2,raw:'):
+            if not server.shell_v2:
+                self.fail('closed')
+                return
+            self.request.sendall(b'OKAY')
+            command = service[len('shell,v2,raw:'):]
+            if command == 'sleep 10':
+                time.sleep(1)
+                return
+            stdout, stderr, exit_code = SHELL_RESPONSES[command]
+            # stdout을 두 packet으로 나눠 보내 이어 붙이는지 확인
+            self.request.sendall(shell_packet(1, stdout[:2]) + shell_packet(2, stderr) +
+                                 shell_packet(1, stdout[2:]) + shell_packet(3, bytes([exit_code])))
+        elif service.startswith('exec:'):
+            self.request.sendall(b'OKAY' + b'\x00\r\n\x89PNG' + service[len('exec:'):].encode('utf-8'))
+        elif service == 'sync:':
+            server.sync_connections += 1
+            self.request.sendall(b'OKAY')
+            self.serve_sync()
+        else:
+            self.fail(f'unknown service {service}')
+
+    def serve_sync(self):
+        while True:
+            header = recv_exact(self.request, 8)
+            command, length = header[:4], struct.unpack('<I', header[4:])[0]
+            if command == b'QUIT':
+                return
+            path = recv_exact(self.request, length).decode('utf-8')
+            if path not in FILES:
+                message = b'No such file or directory'
+                self.request.sendall(b'FAIL' + struct.pack('<I', len(message)) + message)
+                continue
+            data = FILES[path]
+            for offset in range(0, len(data), 65536):
+                chunk = data[offset:offset + 65536]
+                self.request.sendall(b'DATA' + struct.pack('<I', len(chunk)) + chunk)
+            self.request.sendall(b'DONE' + struct.pack('<I', 0))
+            if self.server.drop_sync:
+                # 풀에 들어간 연결이 디바이스 재연결 등으로 끊어진 상황
+                return
+
+
+class FakeAdbServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeAdbHandler)
+        self.requests = []
+        self.sync_connections = 0
+        self.track_connections = 0
+        self.drop_sync = False
+        self.shell_v2 = True
+
+
+@pytest.fixture
+def server():
+    fake = FakeAdbServer()
+    thread = threading.Thread(target=fake.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield fake
+    fake.shutdown()
+    fake.server_close()
+
+
+@pytest.fixture
+def client(server):
+    adb = AdbClient(port=server.server_address[1], timeout=5.0)
+    yield adb
+    adb.close()
+
+
+def test_devices(client):
+    assert client.devices() == [(SERIAL, 'device')]
+
+
+def test_transport_fail_is_connection_error(client):
+    with pytest.raises(AdbConnectionError, match="not found"):
+        client.shell('missing-serial', 'getprop ro.product.model')
+
+
+def test_unreachable_server_is_connection_error():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    with pytest.raises(AdbConnectionError):
+        AdbClient(port=port, timeout=1.0).exec_out(SERIAL, 'screencap')
+
+
+def test_shell_output_and_exit_status(client):
+    result = client.shell(SERIAL, 'getprop ro.product.model')
+    assert (result.returncode, result.stdout, result.stderr) == (0, b'Pixel\n', b'')
+
+    result = client.shell(SERIAL, 'ls /missing')
+    assert result.returncode == 1
+    assert result.stderr == b'ls: /missing: No such file or directory\n'
+
+
+def test_exec_out_keeps_binary_output(client):
+    assert client.exec_out(SERIAL, 'screencap -p') == b'\x00\r\n\x89PNGscreencap -p'
+
+
+def test_pull_reuses_sync_connection(server, client):
+    assert client.pull(SERIAL, '/sdcard/a.txt') == FILES['/sdcard/a.txt']
+    assert client.pull(SERIAL, '/sdcard/big.bin') == FILES['/sdcard/big.bin']
+    assert server.sync_connections == 1
+
+    with pytest.raises(AdbError, match="No such file"):
+        client.pull(SERIAL, '/sdcard/missing')
+
+
+def test_pull_retries_after_stale_pooled_connection(server, client):
+    server.drop_sync = True
+    assert client.pull(SERIAL, '/sdcard/a.txt') == FILES['/sdcard/a.txt']
+    assert client.pull(SERIAL, '/sdcard/a.txt') == FILES['/sdcard/a.txt']
+    assert server.sync_connections == 2
+
+
+def test_track_devices_reconnects(client):
+    changes = []
+    stop_event = threading.Event()
+
+    def on_change(devices):
+        changes.append(devices)
+        if len(changes) == 2:
+            stop_event.set()
+
+    watcher = threading.Thread(target=client.track_devices, args=(on_change, stop_event), daemon=True)
+    watcher.start()
+    watcher.join(timeout=5)
+    stop_event.set()
+    assert changes == [[(SERIAL, 'offline')], [(SERIAL, 'device')]]
+
+
+def make_app(client, monkeypatch, fallback_stdout=None):
+    """adb_shell/adb_exec_out만 쓰는 가짜 앱. subprocess fallback 호출은 기록해서 확인"""
+    fallback_calls = []
+
+    def fake_run(args, **kwargs):
+        fallback_calls.append(args)
+        if fallback_stdout is None:
+            raise AssertionError(f"fallback should not run: {args}")
+        return subprocess.CompletedProcess(args, 0, fallback_stdout, '')
+
+    monkeypatch.setattr(slc.subprocess, 'run', fake_run)
+    return SimpleNamespace(adb=client), fallback_calls
+
+
+def test_adb_shell_checks_exit_status(client, monkeypatch):
+    app, _ = make_app(client, monkeypatch)
+    assert slc.ScreenLayoutCapture.adb_shell(app, SERIAL, ['getprop', 'ro.product.model']) == 'Pixel\n'
+    assert slc.ScreenLayoutCapture.adb_shell(app, SERIAL, 'ls /missing', check=False) == ''
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        slc.ScreenLayoutCapture.adb_shell(app, SERIAL, 'ls /missing')
+    assert error.value.returncode == 1
+
+
+def test_adb_shell_does_not_rerun_after_timeout(server, monkeypatch):
+    client = AdbClient(port=server.server_address[1], timeout=0.2)
+    app, fallback_calls = make_app(client, monkeypatch)
+    with pytest.raises(OSError):
+        slc.ScreenLayoutCapture.adb_shell(app, SERIAL, 'sleep 10')
+    assert fallback_calls == []
+    assert server.requests.count('shell,v2,raw:sleep 10') == 1
+
+
+def test_adb_shell_falls_back_without_shell_v2(server, client, monkeypatch):
+    server.shell_v2 = False
+    app, fallback_calls = make_app(client, monkeypatch, fallback_stdout='Pixel\n')
+    assert slc.ScreenLayoutCapture.adb_shell(app, SERIAL, ['getprop', 'ro.product.model']) == 'Pixel\n'
+    assert fallback_calls == [['adb', '-s', SERIAL, 'shell', 'getprop', 'ro.product.model']]
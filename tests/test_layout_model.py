@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pytest
+
+# ScreenLayoutCapture는 import 시 GUI 관련 패키지를 함께 불러옴
+pytest.importorskip("PIL")
+pytest.importorskip("pystray")
+pytest.importorskip("requests")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ScreenLayoutCapture import LayoutModel  # noqa: E402
+
+MULTILINE_DUMP = """<?xml version="1.0" encoding="UTF-8"?>
+<hierarchy rotation="0">
+  <node index="0" text="line1&#10;line2" bounds="[0,0][100,100]">
+    <node index="0" text="raw
+newline" bounds="[0,0][50,50]"/>
+    <node index="1" text="after" bounds="[50,50][100,100]"/>
+  </node>
+</hierarchy>
+"""
+
+
+def test_attribute_newlines_keep_line_numbers():
+    model = LayoutModel.from_text(MULTILINE_DUMP)
+    assert [node.attrib['text'] for node in model.nodes] == ["line1\nline2", "raw newline", "after"]
+    assert [node.line_num for node in model.nodes] == [3, 4, 6]
+    assert model.node_at_line(6).attrib['text'] == "after"
+    assert model.nodes[2].parent is model.nodes[0]
+    assert model.find_smallest_at(60, 60) is model.nodes[2]
+
+
+def test_broken_text_falls_back_to_line_scan():
+    text = MULTILINE_DUMP.replace('<node index="1" text="after"', '<node index="1" text="after" broken')
+    model = LayoutModel.from_text(text)
+    assert model.node_at_line(6).attrib['text'] == "after"
+    assert model.node_at_line(3).attrib['index'] == "0"
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+# ScreenLayoutCapture는 import 시 GUI 관련 패키지를 함께 불러옴
+pytest.importorskip("PIL")
+pytest.importorskip("pystray")
+pytest.importorskip("requests")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ScreenLayoutCapture import LayoutSelector, SelectorError  # noqa: E402
+
+
+@pytest.mark.parametrize("query", ["[text=]", "[text= ]", "[a=]", "[text!=]"])
+def test_empty_bare_value_is_selector_error(query):
+    with pytest.raises(SelectorError):
+        LayoutSelector(query)
+
+
+def test_bare_and_quoted_values_parse():
+    selector = LayoutSelector('[clickable=true] > [text=""]')
+    assert [step.attr_conditions for step in selector.steps] == [
+        [('clickable', '=', 'true')],
+        [('text', '=', '')],
+    ]
+
+
+@pytest.fixture(scope="module")
+def temp_model():
+    from ScreenLayoutCapture import LayoutModel
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "temp.xml")
+    with open(path, encoding="utf-8") as f:
+        return LayoutModel.from_text(f.read())
+
+
+@pytest.mark.parametrize("type_name", ["ImageButton", "widget.ImageButton", "android.widget.ImageButton"])
+def test_type_name_suffix_matches_index_and_scan(temp_model, type_name):
+    matched = LayoutSelector(type_name).evaluate(temp_model)
+    assert len(matched) == 3
+    assert all(node.attrib['class'] == "android.widget.ImageButton" for node in matched)
+
+
+def test_decimal_pixel_coordinates(temp_model):
+    assert LayoutSelector(":contains(100.5,200.7)").evaluate(temp_model) == \
+        LayoutSelector(":contains(100,200)").evaluate(temp_model)
@@ -0,0 +1,87 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# ScreenLayoutCapture는 import 시 GUI 관련 패키지를 함께 불러옴
+pytest.importorskip("PIL")
+pytest.importorskip("pystray")
+pytest.importorskip("requests")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ScreenLayoutCapture import LayoutModel, LayoutSelector, RegexSearchProcess, format_layout_xml  # noqa: E402
+
+# (a+)+$ 는 'aaa...!'에서 지수 시간으로 backtracking 함
+SLOW_DUMP = """<?xml version="1.0" ?>
+<hierarchy rotation="0">
+  <node index="0" text="%s!" bounds="[0,0][100,100]"/>
+</hierarchy>
+""" % ("a" * 40)
+
+
+@pytest.fixture(scope="module")
+def temp_model():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "temp.xml")
+    with open(path, encoding="utf-8") as f:
+        return format_layout_xml(f.read())[1]
+
+
+@pytest.fixture
+def regex_search():
+    process = RegexSearchProcess()
+    yield process
+    process.close()
+
+
+def test_results_match_in_process_search(temp_model, regex_search):
+    expected = [(node, (attr, span)) for node, attr, span in temp_model.iter_search_columns(r'Butt?on|\d+')]
+    assert expected
+    assert list(regex_search.iter_results(temp_model, 'all', r'Butt?on|\d+')) == expected
+
+    query = '[class~=/image/i]'
+    expected = [(node, None) for node in LayoutSelector(query).iter_matches(temp_model)]
+    assert expected
+    assert list(regex_search.iter_results(temp_model, 'selector', query)) == expected
+
+
+def test_worker_errors_are_raised(temp_model, regex_search):
+    with pytest.raises(ValueError):
+        list(regex_search.iter_results(temp_model, 'selector', '[text~=/(/]'))
+    # 오류 후에도 같은 process로 계속 검색
+    assert list(regex_search.iter_results(temp_model, 'selector', '[class~=/ImageButton/]'))
+
+
+def test_cancel_stops_running_regex(temp_model, regex_search):
+    model = LayoutModel.from_text(SLOW_DUMP)
+    outcome = []
+
+    def consume():
+        try:
+            outcome.append(list(regex_search.iter_results(model, 'all', r'(a+)+$')))
+        except (EOFError, OSError) as e:
+            outcome.append(e)
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    time.sleep(0.5)
+    assert consumer.is_alive()
+
+    started = time.monotonic()
+    regex_search.cancel()
+    consumer.join(timeout=5)
+    assert not consumer.is_alive()
+    assert time.monotonic() - started < 5
+    assert isinstance(outcome[0], (EOFError, OSError))
+
+    # 취소 후 다음 검색은 새 process로 실행
+    assert list(regex_search.iter_results(temp_model, 'all', 'ImageButton'))
+
+
+def test_cancel_before_start_skips_search(temp_model, regex_search):
+    results = regex_search.iter_results(temp_model, 'all', 'ImageButton')
+    regex_search.cancel()
+    assert list(results) == []
+    assert regex_search.process is None
@@ -0,0 +1,55 @@
+import os
+import struct
+import sys
+from io import BytesIO
+
+import pytest
+
+# ScreenLayoutCapture는 import 시 GUI 관련 패키지를 함께 불러옴
+Image = pytest.importorskip("PIL.Image")
+pytest.importorskip("pystray")
+pytest.importorskip("requests")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ScreenLayoutCapture import SCREENCAP_PIXEL_FORMATS, decode_raw_screencap  # noqa: E402
+
+WIDTH, HEIGHT = 3, 2
+
+# 픽셀 포맷별 (10, 20, 30, 255) 한 픽셀의 raw 바이트
+RAW_PIXELS = {
+    'RGBA': bytes([10, 20, 30, 255]),
+    'RGBX': bytes([10, 20, 30, 0]),
+    'BGRA': bytes([30, 20, 10, 255]),
+}
+
+
+def make_raw_screencap(pixel_format, header_size):
+    _, raw_mode, _ = SCREENCAP_PIXEL_FORMATS[pixel_format]
+    header = struct.pack('<III', WIDTH, HEIGHT, pixel_format)
+    if header_size == 16:
+        header += struct.pack('<I', 1)  # colorspace
+    return header + RAW_PIXELS[raw_mode] * (WIDTH * HEIGHT)
+
+
+@pytest.mark.parametrize("header_size", [12, 16])
+@pytest.mark.parametrize("pixel_format", sorted(SCREENCAP_PIXEL_FORMATS))
+@pytest.mark.parametrize("image_format", ["PNG", "BMP"])
+def test_decode_and_save(pixel_format, header_size, image_format):
+    image = decode_raw_screencap(make_raw_screencap(pixel_format, header_size))
+    mode, _, _ = SCREENCAP_PIXEL_FORMATS[pixel_format]
+    assert image.mode == mode
+    assert image.size == (WIDTH, HEIGHT)
+    assert image.getpixel((WIDTH - 1, HEIGHT - 1))[:3] == (10, 20, 30)
+
+    buffer = BytesIO()
+    image.save(buffer, format=image_format)
+    buffer.seek(0)
+    assert Image.open(buffer).size == (WIDTH, HEIGHT)
+
+
+@pytest.mark.parametrize("raw_data", [b"\0" * 8, struct.pack('<III', 1, 1, 99) + b"\0" * 4,
+                                      struct.pack('<III', 2, 2, 1) + b"\0" * 4])
+def test_decode_rejects_bad_input(raw_data):
+    with pytest.raises(ValueError):
+        decode_raw_screencap(raw_data)
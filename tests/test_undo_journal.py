@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+# ScreenLayoutCapture는 import 시 GUI 관련 패키지를 함께 불러옴
+pytest.importorskip("PIL")
+pytest.importorskip("pystray")
+pytest.importorskip("requests")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ScreenLayoutCapture import UndoJournal  # noqa: E402
+
+
+def make_journal(budget_bytes, count):
+    journal = UndoJournal(budget_bytes=budget_bytes)
+    journal.record("")
+    for index in range(1, count + 1):
+        journal.record("x" * index)
+    return journal
+
+
+def test_budget_covers_undo_and_redo():
+    journal = make_journal(10 ** 6, 10)
+    for _ in range(6):
+        journal.undo()
+    assert (len(journal.undo_deltas), len(journal.redo_deltas)) == (4, 6)
+
+    delta_size = journal.undo_deltas[0].size
+    journal.set_budget(delta_size * 5)
+    assert journal.size <= journal.budget_bytes
+    assert journal.size == sum(d.size for d in journal.undo_deltas) + sum(d.size for d in journal.redo_deltas)
+    # 오래된 undo부터 버리고, 그래도 넘으면 가장 먼 redo부터 버림
+    assert (len(journal.undo_deltas), len(journal.redo_deltas)) == (1, 4)
+
+    # 남은 redo는 가까운 것부터 순서대로 적용됨
+    redone = []
+    for _ in range(4):
+        journal.redo()
+        redone.append(journal.text)
+    assert redone == ["x" * 5, "x" * 6, "x" * 7, "x" * 8]
+    assert journal.redo() is None
+
+
+def test_last_delta_is_kept_over_budget():
+    journal = make_journal(1, 3)
+    assert len(journal.undo_deltas) == 1
+    journal.undo()
+    journal.set_budget(0)
+    assert len(journal.redo_deltas) == 1